@@ -5,6 +5,7 @@ Audio-Verarbeitungsklasse für die ATA Audio-Aufnahme
 import os
 import time
 import threading
+from collections import defaultdict, deque
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
@@ -29,18 +30,21 @@ class AudioProcessor:
 
         self.system_buffer = []
         self.mic_buffer = []
-        self.output_buffer = []
+        self.output_buffer = deque()
+        self._dropped_chunks = 0
+        self._last_drop_log = 0.0
 
         self.system_volume = 1.0
         self.mic_volume = 1.0
 
         self.buffer_lock = threading.Lock()
+        self._pair_ready = threading.Event()  # Signalisiert dem Mixer-Thread neue Daten
+        self._mixer_thread = None
         self.system_stream = None
         self.mic_stream = None
 
         self.output_file = None
         self.is_recording = False
-        self.logger = logger
 
         # Speaker Diarization
         self.diarizer = AudioTranscriber(logger=logger) if settings.ENABLE_SPEAKER_DIARIZATION else None
@@ -59,7 +63,7 @@ class AudioProcessor:
 
         with self.buffer_lock:
             self.system_buffer.append(indata.copy())
-            self._mix_if_possible()
+        self._pair_ready.set()
 
     def mic_callback(self, indata, frames, time, status):
         """Callback für Mikrofon-Audio."""
@@ -68,6 +72,18 @@ class AudioProcessor:
 
         with self.buffer_lock:
             self.mic_buffer.append(indata.copy())
+        self._pair_ready.set()
+
+    def _mixer_loop(self):
+        """Mischt gepufferte Audiodaten außerhalb der Audio-Callbacks."""
+        while self.is_recording:
+            self._pair_ready.wait(timeout=0.05)
+            self._pair_ready.clear()
+            with self.buffer_lock:
+                self._mix_if_possible()
+
+        # Restliche Paare nach dem Stoppen noch mischen
+        with self.buffer_lock:
             self._mix_if_possible()
 
     def _mix_if_possible(self):
@@ -110,7 +126,8 @@ class AudioProcessor:
                     # Avoid clipping while preserving stereo field
                     max_val = np.max(np.abs(mixed))
                     if max_val > 1.0:
-                        mixed = mixed / max_val * 0.9
+                        # In-place skalieren, um keine zusätzliche Kopie anzulegen
+                        np.multiply(mixed, np.float32(0.9 / max_val), out=mixed)
 
                     self.output_buffer.append(mixed)
                 else:
@@ -127,6 +144,23 @@ class AudioProcessor:
                     if self.logger:
                         self.logger.log_message(f"Kritischer Audio-Fehler: {ex}", "ERROR")
 
+        self._enforce_output_limit()
+
+    def _enforce_output_limit(self):
+        """Verwirft die ältesten Chunks, wenn der Writer-Thread nicht hinterherkommt."""
+        while len(self.output_buffer) > settings.MAX_OUTPUT_BUFFER_CHUNKS:
+            self.output_buffer.popleft()
+            self._dropped_chunks += 1
+
+        # Höchstens einmal pro Sekunde loggen
+        if self._dropped_chunks and self.logger:
+            now = time.monotonic()
+            if now - self._last_drop_log >= 1.0:
+                self.logger.log_message(
+                    f"Writer zu langsam - {self._dropped_chunks} Audio-Chunks verworfen", "WARNING")
+                self._dropped_chunks = 0
+                self._last_drop_log = now
+
     def start(self, output_file):
         """Startet die Audio-Aufnahme mit verbesserter Audioqualität."""
         self.output_file = output_file
@@ -135,7 +169,8 @@ class AudioProcessor:
         # Puffer leeren
         self.system_buffer = []
         self.mic_buffer = []
-        self.output_buffer = []
+        self.output_buffer = deque()
+        self._dropped_chunks = 0
 
         # Ausgabedatei vorbereiten
         if os.path.exists(output_file):
@@ -181,6 +216,11 @@ class AudioProcessor:
         self.system_stream.start()
         self.mic_stream.start()
 
+        # Mixer-Thread starten (entlastet die Audio-Callbacks)
+        self._pair_ready.clear()
+        self._mixer_thread = threading.Thread(target=self._mixer_loop, daemon=True)
+        self._mixer_thread.start()
+
         # Writer-Thread starten
         self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
         self.writer_thread.start()
@@ -191,14 +231,13 @@ class AudioProcessor:
     def _writer_loop(self):
         """Schreibt gemischte Audiodaten in die Datei."""
         try:
-            while self.is_recording or self.output_buffer:
+            while self.is_recording or self.output_buffer or self._mixer_running():
                 data_to_write = []
 
                 with self.buffer_lock:
                     chunks_to_process = min(10, len(self.output_buffer))
-                    if chunks_to_process > 0:
-                        data_to_write = self.output_buffer[:chunks_to_process]
-                        self.output_buffer = self.output_buffer[chunks_to_process:]
+                    for _ in range(chunks_to_process):
+                        data_to_write.append(self.output_buffer.popleft())
 
                 for chunk in data_to_write:
                     # Stelle sicher, dass wir Stereo-Audio schreiben
@@ -221,6 +260,10 @@ class AudioProcessor:
             if self.logger:
                 self.logger.log_message(f"Fehler im Writer-Thread: {e}", "ERROR")
 
+    def _mixer_running(self):
+        """Prüft, ob der Mixer-Thread noch Daten liefern kann."""
+        return self._mixer_thread is not None and self._mixer_thread.is_alive()
+
     def stop(self):
         """Stoppt die Audio-Aufnahme und führt optional Speaker Diarization durch."""
         self.is_recording = False
@@ -234,6 +277,11 @@ class AudioProcessor:
             self.mic_stream.stop()
             self.mic_stream.close()
 
+        # Auf Mixer-Thread warten
+        self._pair_ready.set()
+        if self._mixer_running():
+            self._mixer_thread.join(timeout=5)
+
         # Auf Writer-Thread warten
         if hasattr(self, 'writer_thread') and self.writer_thread.is_alive():
             self.writer_thread.join(timeout=5)
@@ -281,27 +329,33 @@ class AudioProcessor:
             self.speaker_segments = result.get('segments', [])
 
             if self.logger and self.speaker_segments:
-                # Sprecher-Statistiken berechnen und anzeigen
-                speakers = set(seg['speaker'] for seg in self.speaker_segments)
-                num_speakers = len(speakers)
-                self.logger.log_message(f"Erkannte Sprecher: {num_speakers}", "SUCCESS")
+                # Sprecher-Statistiken in einem Durchlauf sammeln
+                speaker_durations = defaultdict(float)
+                examples_by_speaker = defaultdict(list)
+                total_duration = 0.0
 
-                # Statistiken pro Sprecher
-                speaker_stats = {}
-                total_duration = sum(seg['duration'] for seg in self.speaker_segments)
+                for seg in self.speaker_segments:
+                    speaker = seg['speaker']
+                    duration = seg['duration']
+                    speaker_durations[speaker] += duration
+                    total_duration += duration
 
-                for speaker in speakers:
-                    speaker_segs = [seg for seg in self.speaker_segments if seg['speaker'] == speaker]
-                    speaker_duration = sum(seg['duration'] for seg in speaker_segs)
+                    # Max. 3 Beispiele pro Sprecher merken
+                    text = seg.get('text')
+                    examples = examples_by_speaker[speaker]
+                    if text and len(examples) < 3:
+                        examples.append(text)
+
+                self.logger.log_message(f"Erkannte Sprecher: {len(speaker_durations)}", "SUCCESS")
+
+                # Statistiken pro Sprecher
+                for speaker, speaker_duration in speaker_durations.items():
                     speaker_percentage = (speaker_duration / total_duration) * 100 if total_duration > 0 else 0
                     self.logger.log_message(f"{speaker}: {speaker_duration:.1f}s ({speaker_percentage:.1f}%)", "INFO")
 
-                    # Transkription pro Sprecher zeigen (max. 3 Beispiele)
-                    examples = [seg['text'] for seg in speaker_segs if seg.get('text')][:3]
-                    if examples:
-                        for i, example in enumerate(examples):
-                            if example:  # Leere Beispiele überspringen
-                                self.logger.log_message(f"  Beispiel {i + 1}: {example}", "INFO")
+                    # Transkription pro Sprecher zeigen
+                    for i, example in enumerate(examples_by_speaker[speaker]):
+                        self.logger.log_message(f"  Beispiel {i + 1}: {example}", "INFO")
             elif self.logger:
                 # Auch wenn keine Segmente gefunden wurden, zeige die Transkription
                 if 'transcription' in result or 'full_text' in result:
@@ -1,12 +1,67 @@
 # audio/simple_speaker_diarization.py
+import os
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import webrtcvad
 import soundfile as sf
-from sklearn.cluster import KMeans
-from scipy.signal import medfilt
+import soxr
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+import scipy.fftpack
+from scipy.ndimage import correlate1d
+from scipy.signal import savgol_coeffs, savgol_filter
+from scipy.spatial.distance import pdist
 import librosa
 from config import settings
 
+# Silero-VAD ist optional, ohne onnxruntime wird WebRTC VAD verwendet
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+SILERO_FRAME_LENGTH = 512  # 32 ms bei 16kHz
+SILERO_CONTEXT = 64  # Kontext-Samples aus dem vorherigen Frame (Silero v5)
+
+
+def _vad_batch(frames, sample_rate, vad):
+    """Wertet einen Block von PCM16-Frames mit einer (wiederverwendeten) WebRTC VAD aus"""
+    frames_view = memoryview(frames.tobytes())
+    step = frames.shape[1] * 2  # Bytes pro Frame
+    n_frames = frames.shape[0]
+    return np.fromiter(
+        (vad.is_speech(frames_view[i * step:(i + 1) * step], sample_rate) for i in range(n_frames)),
+        dtype=bool, count=n_frames
+    )
+
+
+def _silero_speech_probs(session, waveform, sample_rate, batch_size):
+    """Berechnet Silero-Sprachwahrscheinlichkeiten, die Datei läuft als Batch unabhängiger Teilströme"""
+    n_frames = len(waveform) // SILERO_FRAME_LENGTH
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    # Datei in batch_size zusammenhängende Teilströme zerlegen, jeder behält seinen eigenen Zustand
+    n_streams = min(batch_size, n_frames)
+    steps = -(-n_frames // n_streams)
+    frames = np.zeros((n_streams * steps, SILERO_FRAME_LENGTH), dtype=np.float32)
+    frames[:n_frames] = waveform[:n_frames * SILERO_FRAME_LENGTH].reshape(n_frames, SILERO_FRAME_LENGTH)
+    streams = frames.reshape(n_streams, steps, SILERO_FRAME_LENGTH)
+
+    state = np.zeros((2, n_streams, 128), dtype=np.float32)
+    context = np.zeros((n_streams, SILERO_CONTEXT), dtype=np.float32)
+    sr = np.array(sample_rate, dtype=np.int64)
+    probs = np.empty((n_streams, steps), dtype=np.float32)
+
+    for step in range(steps):
+        chunk = streams[:, step]
+        output, state = session.run(
+            None, {'input': np.concatenate((context, chunk), axis=1), 'state': state, 'sr': sr})
+        probs[:, step] = output[:, 0]
+        context = chunk[:, -SILERO_CONTEXT:]
+
+    return probs.reshape(-1)[:n_frames]
+
 
 class SimpleSpeakerDiarizer:
     def __init__(self, n_speakers=None):
@@ -16,17 +71,52 @@ class SimpleSpeakerDiarizer:
         self.frame_duration = 30  # ms
         self.sample_rate = 16000
         self.min_cluster_size = 3  # Mindestanzahl von Segmenten pro Cluster
+        self.silhouette_sample_size = 200  # Stichprobengröße für den Silhouette-Score
+
+        # Threads für die Silero-Inferenz
+        self.n_workers = os.cpu_count() or 1
+
+        # Optionale Silero-VAD (None = WebRTC VAD)
+        self._silero = self._create_silero_session()
+
+        # Optionales GPU-Spektrogramm, lohnt sich erst ab ca. 10 Minuten Audio
+        self.gpu_stft_min_samples = 10 * 60 * self.sample_rate
+        self._torch = None
+        self._torch_device = self._create_torch_device()
+
+        # Parameter für das gemeinsame Spektrogramm
+        self.n_fft = 512
+        self.hop_length = 160  # 10 ms bei 16kHz
+        self.n_mels = 40
+        self.n_mfcc = 20
+
+        # Frequenz-Bins für die Pitch-Schätzung (80-400 Hz)
+        self._pitch_bins = slice(int(80 * self.n_fft / self.sample_rate), int(400 * self.n_fft / self.sample_rate) + 1)
+
+        # Mel-Filterbank und DCT-Basis hängen nur von den Parametern ab
+        self._mel_basis = librosa.filters.mel(
+            sr=self.sample_rate, n_fft=self.n_fft, n_mels=self.n_mels).astype(np.float32)
+        self._dct = scipy.fftpack.dct(np.eye(self.n_mels), axis=0, norm='ortho')[:self.n_mfcc].astype(np.float32)
+
+        # Savitzky-Golay-Kerne für Delta und Delta-Delta (width=9), nur für Segmente unter 9 Frames
+        self._delta_k = savgol_coeffs(9, 1, deriv=1, use='dot').astype(np.float32)
+        self._delta2_k = savgol_coeffs(9, 2, deriv=2, use='dot').astype(np.float32)
 
     def process_audio(self, audio_file_path):
         """Führt eine verbesserte Speaker Diarization durch"""
-        # Audio laden und auf 16kHz resamplen
-        waveform, original_sr = sf.read(audio_file_path)
+        # Audio direkt als float32 laden
+        waveform, original_sr = sf.read(audio_file_path, dtype='float32')
+
+        # Mono konvertieren falls nötig (vor dem Resampling, halbiert die Arbeit bei Stereo)
+        if waveform.ndim > 1:
+            waveform = waveform.mean(axis=1, dtype=np.float32)
+
+        # Auf 16kHz resamplen, 'QQ'-Qualität reicht für VAD und Clustering
         if original_sr != self.sample_rate:
-            waveform = librosa.resample(waveform, orig_sr=original_sr, target_sr=self.sample_rate)
+            waveform = soxr.resample(waveform, original_sr, self.sample_rate, quality='QQ')
 
-        # Mono konvertieren falls nötig
-        if len(waveform.shape) > 1:
-            waveform = np.mean(waveform, axis=1)
+        # Einmalig zusammenhängend im Speicher ablegen, alle weiteren Schritte arbeiten auf Views
+        waveform = np.ascontiguousarray(waveform, dtype=np.float32)
 
         # Voice Activity Detection
         speech_segments = self._detect_speech(waveform)
@@ -34,8 +124,11 @@ class SimpleSpeakerDiarizer:
         # Features extrahieren für Sprecher-Segmente
         features = self._extract_features(waveform, speech_segments)
 
+        # Features einmalig standardisieren, Schätzung und Clustering teilen sich das Ergebnis
+        scaled_features = self._standardize(features)
+
         # Clustering der Sprecher
-        speaker_labels = self._cluster_speakers(features)
+        speaker_labels = self._cluster_speakers(scaled_features)
 
         # Segmente erstellen
         segments = self._create_segments(speech_segments, speaker_labels)
@@ -45,130 +138,220 @@ class SimpleSpeakerDiarizer:
 
         return segments
 
-    def _detect_speech(self, waveform):
-        """Erkennt Sprachsegmente mit WebRTC VAD"""
-        speech_segments = []
-        frame_length = int(self.sample_rate * self.frame_duration / 1000)
-
-        for i in range(0, len(waveform) - frame_length, frame_length):
-            frame = waveform[i:i + frame_length]
-            # PCM16 konvertieren
-            frame_pcm = (frame * 32767).astype(np.int16)
-            is_speech = self.vad.is_speech(frame_pcm.tobytes(), self.sample_rate)
+    def _create_silero_session(self):
+        """Lädt das Silero-VAD-Modell, falls konfiguriert und onnxruntime verfügbar ist"""
+        if settings.VAD_BACKEND != "silero":
+            return None
+        if ort is None:
+            print("[DIARIZER] onnxruntime nicht installiert, verwende WebRTC VAD")
+            return None
+        if not os.path.isfile(settings.SILERO_VAD_MODEL_PATH):
+            print(f"[DIARIZER] Silero-Modell nicht gefunden ({settings.SILERO_VAD_MODEL_PATH}), verwende WebRTC VAD")
+            return None
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.n_workers
+        try:
+            return ort.InferenceSession(
+                settings.SILERO_VAD_MODEL_PATH, sess_options=options, providers=['CPUExecutionProvider'])
+        except Exception as e:
+            print(f"[DIARIZER] Silero-Modell konnte nicht geladen werden: {e}, verwende WebRTC VAD")
+            return None
+
+    def _create_torch_device(self):
+        """Liefert das CUDA-Gerät für das Spektrogramm, falls konfiguriert und verfügbar"""
+        if settings.DIARIZER_DEVICE != "cuda":
+            return None
+        try:
+            import torch
+        except ImportError:
+            print("[DIARIZER] torch nicht installiert, berechne Spektrogramm auf der CPU")
+            return None
+        if not torch.cuda.is_available():
+            print("[DIARIZER] Keine CUDA-GPU verfügbar, berechne Spektrogramm auf der CPU")
+            return None
+
+        self._torch = torch
+        return torch.device("cuda")
 
-            if is_speech:
-                start_time = i / self.sample_rate
-                end_time = (i + frame_length) / self.sample_rate
-                speech_segments.append((start_time, end_time))
+    def _detect_speech(self, waveform):
+        """Erkennt Sprachsegmente mit Silero VAD (falls aktiv) oder WebRTC VAD"""
+        if self._silero is not None:
+            frame_length = SILERO_FRAME_LENGTH
+            probs = _silero_speech_probs(self._silero, waveform, self.sample_rate, settings.SILERO_VAD_BATCH_SIZE)
+            is_speech = probs >= settings.SILERO_VAD_THRESHOLD
+        else:
+            frame_length, is_speech = self._webrtc_speech_mask(waveform)
+
+        # Zusammenhängende Sprach-Frames per Flankenerkennung zu Segmenten zusammenfassen
+        padded = np.concatenate(([False], is_speech, [False]))
+        edges = np.diff(padded.astype(np.int8))
+        frame_seconds = frame_length / self.sample_rate
+        start_times = np.flatnonzero(edges == 1) * frame_seconds
+        end_times = np.flatnonzero(edges == -1) * frame_seconds
+        speech_segments = list(zip(start_times.tolist(), end_times.tolist()))
 
         # Segmente zusammenführen
         merged_segments = self._merge_segments(speech_segments)
         return merged_segments
 
+    def _webrtc_speech_mask(self, waveform):
+        """Liefert Frame-Länge und Sprach-Maske der WebRTC VAD"""
+        frame_length = int(self.sample_rate * self.frame_duration / 1000)
+        n_frames = max(0, (len(waveform) - 1) // frame_length)
+
+        # Gesamte Datei einmalig in PCM16-Frames umwandeln
+        frames = (waveform[:n_frames * frame_length].reshape(n_frames, frame_length) * 32767).astype(np.int16)
+
+        # Seriell mit einer VAD-Instanz, damit die Entscheidungen über die ganze Datei durchgehend sind
+        # (ein Prozess-Pool lohnt sich wegen Start- und Importkosten der Worker nicht)
+        is_speech = _vad_batch(frames, self.sample_rate, self.vad)
+
+        return frame_length, is_speech
+
     def _merge_segments(self, segments, gap_threshold=0.3):
         """Fügt nahe beieinander liegende Segmente zusammen"""
         if not segments:
             return []
 
-        merged = []
-        current_start, current_end = segments[0]
+        arr = np.asarray(segments, dtype=np.float64)
 
-        for start, end in segments[1:]:
-            if start - current_end < gap_threshold:
-                current_end = end
-            else:
-                if current_end - current_start >= settings.MIN_SPEECH_DURATION:
-                    merged.append((current_start, current_end))
-                current_start, current_end = start, end
+        # Neue Segmente beginnen nur dort, wo die Pause den Schwellenwert erreicht
+        keep_boundary = arr[1:, 0] - arr[:-1, 1] >= gap_threshold
+        starts = arr[np.concatenate(([True], keep_boundary)), 0]
+        ends = arr[np.concatenate((keep_boundary, [True])), 1]
 
-        if current_end - current_start >= settings.MIN_SPEECH_DURATION:
-            merged.append((current_start, current_end))
-        return merged
+        long_enough = ends - starts >= settings.MIN_SPEECH_DURATION
+        return list(zip(starts[long_enough].tolist(), ends[long_enough].tolist()))
 
     def _extract_features(self, waveform, segments):
         """Extrahiert erweiterte Audio-Features für bessere Sprechererkennung"""
-        features = []
+        sr = self.sample_rate
+        # 4 MFCC-Statistiken + 6 skalare Features pro Segment
+        feat_dim = 4 * self.n_mfcc + 6
+        features = np.empty((len(segments), feat_dim), dtype=np.float32)
 
-        for start, end in segments:
-            start_sample = int(start * self.sample_rate)
-            end_sample = int(end * self.sample_rate)
-            segment = waveform[start_sample:end_sample]
+        if not segments:
+            return features
 
-            # MFCC Features (erweitert)
-            mfccs = librosa.feature.mfcc(y=segment, sr=self.sample_rate, n_mfcc=20)  # Erhöht von 13 auf 20
-            mfcc_mean = np.mean(mfccs, axis=1)
-            mfcc_std = np.std(mfccs, axis=1)  # Standardabweichung hinzugefügt
+        # Einmaliges STFT für die gesamte Datei, Segmente werden nur noch ausgeschnitten
+        magnitude = self._magnitude_spectrogram(waveform)
+        freqs = librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)
 
-            # Delta und Delta-Delta (Dynamik-Features)
-            mfcc_delta = librosa.feature.delta(mfccs)
-            mfcc_delta2 = librosa.feature.delta(mfccs, order=2)
-            delta_mean = np.mean(mfcc_delta, axis=1)
-            delta2_mean = np.mean(mfcc_delta2, axis=1)
-
-            # Zusätzliche Features
-            zcr = np.mean(librosa.feature.zero_crossing_rate(segment))
-            rms = np.mean(librosa.feature.rms(y=segment))
-
-            # Spektrale Features hinzufügen
-            spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=segment, sr=self.sample_rate))
-            spectral_bandwidth = np.mean(librosa.feature.spectral_bandwidth(y=segment, sr=self.sample_rate))
-            spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=segment, sr=self.sample_rate))
-
-            # Fundamental frequency (Pitch) schätzen
-            pitches, magnitudes = librosa.piptrack(y=segment, sr=self.sample_rate)
-            pitch = 0
-            if np.any(magnitudes > 0):
-                pitch_idx = np.argmax(magnitudes, axis=0)
-                pitches_per_frame = np.take_along_axis(pitches, pitch_idx[np.newaxis, :], axis=0)
-                pitch = np.mean(pitches_per_frame[pitches_per_frame > 0]) if np.any(pitches_per_frame > 0) else 0
-
-            # Alle Features kombinieren
-            feature_vector = np.concatenate([
-                mfcc_mean, mfcc_std, delta_mean, delta2_mean,
-                [zcr, rms, spectral_centroid, spectral_bandwidth, spectral_rolloff, pitch]
-            ])
+        # Frame-basierte Features ebenfalls nur einmal berechnen
+        zcr_frames = librosa.feature.zero_crossing_rate(
+            waveform, frame_length=self.n_fft, hop_length=self.hop_length)[0]
+        rms_frames = librosa.feature.rms(S=magnitude, frame_length=self.n_fft, hop_length=self.hop_length)[0]
+        pitch_freqs = freqs[self._pitch_bins, None]
 
-            features.append(feature_vector)
+        n_frames = magnitude.shape[1]
+        n_mfcc = self.n_mfcc
+        eps = np.finfo(magnitude.dtype).tiny
 
-        return np.array(features)
+        for i, (start, end) in enumerate(segments):
+            f0 = min(int(start * sr / self.hop_length), n_frames - 1)
+            f1 = min(max(int(end * sr / self.hop_length), f0 + 1), n_frames)
+            S_slice = magnitude[:, f0:f1]
 
-    def _cluster_speakers(self, features):
-        """Verbesserte Methode zum Clustern von Sprecher-Features"""
-        if len(features) < 2:
-            return np.zeros(len(features), dtype=int)
+            # MFCC Features (erweitert)
+            mfccs = self._dct @ librosa.power_to_db(self._mel_basis @ (S_slice ** 2))
 
-        # Standardisiere Features für besseres Clustering
-        from sklearn.preprocessing import StandardScaler
-        scaler = StandardScaler()
-        scaled_features = scaler.fit_transform(features)
+            # Delta und Delta-Delta (Dynamik-Features)
+            mfcc_delta = self._delta(mfccs, 1, self._delta_k)
+            mfcc_delta2 = self._delta(mfccs, 2, self._delta2_k)
+
+            # Spektrale Features direkt aus dem gemeinsamen Spektrogramm
+            frame_energy = np.maximum(S_slice.sum(axis=0), eps)
+            centroid = (freqs[:, None] * S_slice).sum(axis=0) / frame_energy
+            bandwidth = np.sqrt(((freqs[:, None] - centroid) ** 2 * S_slice).sum(axis=0) / frame_energy)
+            rolloff_idx = (np.cumsum(S_slice, axis=0) < 0.85 * frame_energy).sum(axis=0)
+            rolloff = freqs[np.minimum(rolloff_idx, len(freqs) - 1)]
+
+            # Fundamental frequency (Pitch) als Schwerpunkt im Sprachgrundton-Bereich schätzen
+            pitch_band = S_slice[self._pitch_bins]
+            band_energy = pitch_band.sum(axis=0)
+            pitches_per_frame = (pitch_freqs * pitch_band).sum(axis=0) / np.maximum(band_energy, eps)
+            # Stille Frames liefern bereits 0, daher reicht Summe durch Anzahl der stimmhaften Frames
+            pitch = pitches_per_frame.sum() / max(np.count_nonzero(band_energy), 1)
+
+            # Alle Frame-Features stapeln und in einem Schritt mitteln
+            frame_features = np.vstack([
+                mfccs, mfcc_delta, mfcc_delta2,
+                zcr_frames[None, f0:f1], rms_frames[None, f0:f1], centroid[None], bandwidth[None], rolloff[None]
+            ])
+            means = frame_features.mean(axis=1)
+
+            # Alle Features kombinieren: MFCC-Mittel, MFCC-Streuung, Delta, Delta-Delta, Skalare, Pitch
+            features[i, :n_mfcc] = means[:n_mfcc]
+            features[i, n_mfcc:2 * n_mfcc] = mfccs.std(axis=1)
+            features[i, 2 * n_mfcc:4 * n_mfcc] = means[n_mfcc:3 * n_mfcc]
+            features[i, 4 * n_mfcc:-1] = means[3 * n_mfcc:]
+            features[i, -1] = pitch
+
+        return features
+
+    def _delta(self, features, order, kernel):
+        """
+        Delta-Features entlang der Frames, identisch zu librosa.feature.delta (width=9, mode='interp')
+
+        Die Randframes werden dabei über ein Polynom an das Randfenster bestimmt. librosa lehnt
+        Segmente mit weniger als 9 Frames ab, dort werden die Ränder stattdessen fortgesetzt.
+        """
+        if features.shape[1] >= 9:
+            return savgol_filter(features, 9, order, deriv=order, axis=1, mode='interp')
+        return correlate1d(features, kernel, axis=1, mode='nearest')
+
+    def _magnitude_spectrogram(self, waveform):
+        """Betragsspektrogramm der gesamten Datei, bei langen Aufnahmen optional auf der GPU"""
+        if self._torch_device is None or len(waveform) < self.gpu_stft_min_samples:
+            return np.abs(librosa.stft(waveform, n_fft=self.n_fft, hop_length=self.hop_length))
+
+        # Gleiche Parameter wie librosa.stft (periodisches Hann-Fenster, zentrierte Frames, Null-Padding)
+        torch = self._torch
+        wav = torch.from_numpy(waveform).to(self._torch_device)
+        window = torch.hann_window(self.n_fft, device=self._torch_device)
+        spec = torch.stft(wav, n_fft=self.n_fft, hop_length=self.hop_length, window=window,
+                          center=True, pad_mode='constant', return_complex=True)
+        return spec.abs().cpu().numpy()
+
+    def _standardize(self, features):
+        """Standardisiert die Features spaltenweise auf Mittelwert 0 und Varianz 1 (in-place)"""
+        if len(features) == 0:
+            return features
+
+        mu = features.mean(axis=0)
+        sigma = features.std(axis=0)
+        sigma[sigma == 0] = 1
+        features -= mu
+        features /= sigma
+        return features
+
+    def _cluster_speakers(self, scaled_features):
+        """Verbesserte Methode zum Clustern von (standardisierten) Sprecher-Features"""
+        if len(scaled_features) < 2:
+            return np.zeros(len(scaled_features), dtype=int)
 
         # Bestimme Anzahl der Sprecher
         if self.n_speakers is None:
             # Automatische Erkennung der Sprecher-Anzahl mit verbesserter Methode
-            self.n_speakers = self._estimate_n_speakers(features)
+            self.n_speakers = self._estimate_n_speakers(scaled_features)
             print(f"[DIARIZER] Geschätzte Sprecheranzahl: {self.n_speakers}")
 
         # Stelle sicher, dass wir mindestens 2 Sprecher haben, wenn mehr als 5 Segmente vorhanden sind
         # aber nicht mehr als settings.MAX_SPEAKERS
-        if len(features) >= 5:
+        if len(scaled_features) >= 5:
             self.n_speakers = max(2, min(self.n_speakers, settings.MAX_SPEAKERS))
 
-        n_clusters = min(self.n_speakers, len(features))
+        n_clusters = min(self.n_speakers, len(scaled_features))
 
         # Verwende KMeans mit mehreren Neustarts für bessere Ergebnisse
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        kmeans = self._create_kmeans(n_clusters, len(scaled_features))
         labels = kmeans.fit_predict(scaled_features)
 
         # Berechne Cluster-Abstände, um zu überprüfen, ob tatsächlich unterschiedliche Sprecher vorliegen
         cluster_centers = kmeans.cluster_centers_
         if len(cluster_centers) > 1:
-            from scipy.spatial.distance import euclidean
-            distances = []
-            for i in range(len(cluster_centers)):
-                for j in range(i + 1, len(cluster_centers)):
-                    distances.append(euclidean(cluster_centers[i], cluster_centers[j]))
-
-            avg_distance = np.mean(distances)
+            avg_distance = pdist(cluster_centers).mean()
 
             # Wenn die Cluster zu nah beieinander liegen (ähnliche Stimmen),
             # reduziere die Anzahl der Sprecher
@@ -179,92 +362,106 @@ class SimpleSpeakerDiarizer:
 
                 if n_clusters > 2:
                     # Versuche mit weniger Clustern
-                    kmeans = KMeans(n_clusters=2, random_state=42, n_init=10)
+                    n_clusters = 2
+                    kmeans = self._create_kmeans(n_clusters, len(scaled_features))
                     labels = kmeans.fit_predict(scaled_features)
                 else:
                     # Bei nur 2 Clustern, prüfe ob wir wirklich 2 Sprecher haben
                     # oder alle zu einem zusammenfassen sollten
                     if avg_distance < 1.0:
                         print("[DIARIZER] Sprecher zu ähnlich, verwende nur einen Sprecher")
-                        return np.zeros(len(features), dtype=int)
+                        return np.zeros(len(scaled_features), dtype=int)
 
         # Prüfe, ob alle Sprecher genügend Segmente haben
-        for i in range(n_clusters):
-            if np.sum(labels == i) < self.min_cluster_size:
-                print(
-                    f"[DIARIZER] Cluster {i} hat zu wenige Segmente ({np.sum(labels == i)}), reduziere Sprecheranzahl")
-                # Wenn ein Cluster zu klein ist, reduziere die Anzahl der Sprecher
-                if n_clusters > 2:
-                    kmeans = KMeans(n_clusters=n_clusters - 1, random_state=42, n_init=10)
-                    labels = kmeans.fit_predict(scaled_features)
-                    # Prüfe erneut rekursiv
-                    return self._validate_and_refine_clusters(labels, scaled_features, n_clusters - 1)
-                else:
-                    # Bei nur 2 Clustern, prüfe ob wir wirklich 2 Sprecher haben
-                    if np.sum(labels == 0) < self.min_cluster_size or np.sum(labels == 1) < self.min_cluster_size:
-                        print("[DIARIZER] Zu wenig Segmente für zwei Sprecher, verwende nur einen Sprecher")
-                        return np.zeros(len(features), dtype=int)
-
-        # Glättung der Labels mit Median-Filter
+        cluster_sizes = np.bincount(labels, minlength=n_clusters)
+        if cluster_sizes.min() < self.min_cluster_size:
+            print(
+                f"[DIARIZER] Cluster {cluster_sizes.argmin()} hat zu wenige Segmente ({cluster_sizes.min()}), "
+                f"reduziere Sprecheranzahl")
+            # Wenn ein Cluster zu klein ist, reduziere die Anzahl der Sprecher schrittweise
+            return self._validate_and_refine_clusters(labels, scaled_features, n_clusters)
+
+        # Glättung der Labels mit Modus-Filter (häufigster Sprecher im Fenster)
         if len(labels) > 5:
-            labels = medfilt(labels, kernel_size=5)
+            labels = self._mode_filter(labels, kernel_size=5)
 
         return labels
 
+    def _mode_filter(self, labels, kernel_size=5):
+        """Ersetzt jedes Label durch das häufigste Label in seinem Fenster"""
+        half = kernel_size // 2
+        windows = sliding_window_view(np.pad(labels, half, mode='reflect'), kernel_size)
+        counts = (windows[..., None] == np.arange(labels.max() + 1)).sum(axis=1)
+        return counts.argmax(axis=1)
+
     def _validate_and_refine_clusters(self, labels, features, n_clusters):
         """Validiert die Cluster und verfeinert sie bei Bedarf"""
-        for i in range(n_clusters):
-            if np.sum(labels == i) < self.min_cluster_size:
-                if n_clusters > 2:
-                    kmeans = KMeans(n_clusters=n_clusters - 1, random_state=42, n_init=10)
-                    labels = kmeans.fit_predict(features)
-                    return self._validate_and_refine_clusters(labels, features, n_clusters - 1)
-                else:
-                    return np.zeros(len(features), dtype=int)
+        while np.bincount(labels, minlength=n_clusters).min() < self.min_cluster_size:
+            if n_clusters <= 2:
+                # Bei nur 2 Clustern: zu wenig Segmente für zwei Sprecher
+                print("[DIARIZER] Zu wenig Segmente für zwei Sprecher, verwende nur einen Sprecher")
+                return np.zeros(len(features), dtype=int)
+
+            n_clusters -= 1
+            labels = self._create_kmeans(n_clusters, len(features)).fit_predict(features)
         return labels
 
-    def _estimate_n_speakers(self, features):
-        """Verbesserte Schätzung der Anzahl der Sprecher mit Silhouette-Score"""
-        from sklearn.metrics import silhouette_score
+    def _create_kmeans(self, n_clusters, n_samples):
+        """Erstellt das Clustering-Modell für kleine, hochdimensionale Feature-Mengen"""
+        return MiniBatchKMeans(
+            n_clusters=n_clusters, random_state=42, n_init=3, batch_size=min(256, n_samples))
+
+    def _split_heaviest_cluster(self, features, centers, labels):
+        """Start-Zentren für k+1 Cluster: das größte Cluster bekommt seinen entferntesten Punkt als neues Zentrum"""
+        heaviest = np.bincount(labels, minlength=len(centers)).argmax()
+        members = features[labels == heaviest]
+        farthest = members[np.argmax(((members - centers[heaviest]) ** 2).sum(axis=1))]
+        return np.vstack([centers, farthest]).astype(features.dtype, copy=False)
 
+    def _estimate_n_speakers(self, scaled_features):
+        """Verbesserte Schätzung der Anzahl der Sprecher mit Silhouette-Score"""
         min_clusters = 1
-        max_clusters = min(settings.MAX_SPEAKERS, len(features) // 3, 5)  # Begrenzen auf max. 5 Sprecher
+        max_clusters = min(settings.MAX_SPEAKERS, len(scaled_features) // 3, 5)  # Begrenzen auf max. 5 Sprecher
         max_clusters = max(max_clusters, 2)  # Mindestens 2 Cluster probieren
 
-        if len(features) < 4:  # Zu wenige Daten für verlässliche Schätzung
+        if len(scaled_features) < 4:  # Zu wenige Daten für verlässliche Schätzung
             return 1
 
         best_n_clusters = 1
         best_score = -1
 
-        # Standardisiere Features
-        from sklearn.preprocessing import StandardScaler
-        scaler = StandardScaler()
-        scaled_features = scaler.fit_transform(features)
+        # Silhouette ist quadratisch in der Segmentanzahl, bei vielen Segmenten nur eine Stichprobe bewerten
+        sample_size = self.silhouette_sample_size if len(scaled_features) > self.silhouette_sample_size else None
 
-        # Teste verschiedene Cluster-Anzahlen
+        # Teste verschiedene Cluster-Anzahlen, jede Stufe startet mit den Zentren der vorherigen
+        centers = None
+        labels = None
         for n_clusters in range(min_clusters, max_clusters + 1):
-            if len(features) <= n_clusters:
+            # Silhouette-Score braucht mindestens 2 Cluster, ein Fit für 1 Cluster ist überflüssig
+            if n_clusters < 2 or len(scaled_features) <= n_clusters:
                 continue
 
-            # KMeans mit mehreren Restarts
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+            if centers is None:
+                kmeans = KMeans(n_clusters=n_clusters, n_init=3, algorithm='elkan', random_state=42)
+            else:
+                init = self._split_heaviest_cluster(scaled_features, centers, labels)
+                kmeans = KMeans(n_clusters=n_clusters, init=init, n_init=1, algorithm='elkan', random_state=42)
             labels = kmeans.fit_predict(scaled_features)
+            centers = kmeans.cluster_centers_
 
             # Berechne Silhouette-Score für diese Cluster-Anzahl
-            if n_clusters > 1:  # Silhouette-Score braucht mindestens 2 Cluster
-                try:
-                    score = silhouette_score(scaled_features, labels)
-                    print(f"[DIARIZER] Silhouette-Score für {n_clusters} Cluster: {score:.4f}")
+            try:
+                score = silhouette_score(scaled_features, labels, sample_size=sample_size, random_state=42)
+                print(f"[DIARIZER] Silhouette-Score für {n_clusters} Cluster: {score:.4f}")
 
-                    if score > best_score:
-                        best_score = score
-                        best_n_clusters = n_clusters
-                except:
-                    pass  # Fehler beim Silhouette-Score ignorieren
+                if score > best_score:
+                    best_score = score
+                    best_n_clusters = n_clusters
+            except:
+                pass  # Fehler beim Silhouette-Score ignorieren
 
         # Als Fallback, wenn es mit Silhouette nicht funktioniert
-        if best_n_clusters == 1 and len(features) >= 10:
+        if best_n_clusters == 1 and len(scaled_features) >= 10:
             return 2  # Default zu 2 Sprechern bei genügend Segmenten
 
         return best_n_clusters
@@ -292,48 +489,46 @@ class SimpleSpeakerDiarizer:
         sorted_segments = sorted(segments, key=lambda x: x['start'])
 
         # Benachbarte Segmente des gleichen Sprechers zusammenführen
-        i = 0
-        while i < len(sorted_segments) - 1:
-            current = sorted_segments[i]
-            next_seg = sorted_segments[i + 1]
+        merged = [sorted_segments[0]]
+        for next_seg in sorted_segments[1:]:
+            current = merged[-1]
 
             # Wenn gleicher Sprecher und nicht zu weit entfernt, zusammenführen
             if (current['speaker'] == next_seg['speaker'] and
                     next_seg['start'] - current['end'] < 0.5):  # Max 0.5s Pause
-
-                # Segmente zusammenführen
                 current['end'] = next_seg['end']
                 current['duration'] = current['end'] - current['start']
-
-                # Nächstes Segment entfernen
-                sorted_segments.pop(i + 1)
             else:
-                i += 1
+                merged.append(next_seg)
 
         # Sehr kurze Segmente zwischen gleichen Sprechern eliminieren
-        if len(sorted_segments) >= 3:
-            i = 1
-            while i < len(sorted_segments) - 1:
-                prev = sorted_segments[i - 1]
-                current = sorted_segments[i]
-                next_seg = sorted_segments[i + 1]
-
-                # Wenn aktuelles Segment kurz ist und benachbarte Segmente gleichen Sprecher haben
-                if (current['duration'] < min_duration and
-                        prev['speaker'] == next_seg['speaker'] and
-                        prev['speaker'] != current['speaker']):
-
-                    # Aktuelles Segment dem Sprecher der Nachbarsegmente zuweisen
-                    current['speaker'] = prev['speaker']
-
-                    # Optional: Benachbarte Segmente zusammenführen
-                    if next_seg['start'] - current['end'] < 0.3 and current['end'] - prev['end'] < 0.3:
-                        prev['end'] = next_seg['end']
-                        prev['duration'] = prev['end'] - prev['start']
-                        sorted_segments.pop(i)
-                        sorted_segments.pop(i)  # Nächstes Segment auch entfernen
-                        continue
-
-                i += 1
-
-        return sorted_segments
\ No newline at end of file
+        if len(merged) < 3:
+            return merged
+
+        smoothed = [merged[0]]
+        i = 1
+        while i < len(merged) - 1:
+            prev = smoothed[-1]
+            current = merged[i]
+            next_seg = merged[i + 1]
+
+            # Wenn aktuelles Segment kurz ist und benachbarte Segmente gleichen Sprecher haben
+            if (current['duration'] < min_duration and
+                    prev['speaker'] == next_seg['speaker'] and
+                    prev['speaker'] != current['speaker']):
+
+                # Aktuelles Segment dem Sprecher der Nachbarsegmente zuweisen
+                current['speaker'] = prev['speaker']
+
+                # Optional: Benachbarte Segmente zusammenführen (aktuelles und nächstes überspringen)
+                if next_seg['start'] - current['end'] < 0.3 and current['end'] - prev['end'] < 0.3:
+                    prev['end'] = next_seg['end']
+                    prev['duration'] = prev['end'] - prev['start']
+                    i += 2
+                    continue
+
+            smoothed.append(current)
+            i += 1
+
+        smoothed.extend(merged[i:])
+        return smoothed
@@ -2,42 +2,316 @@
 """
 Verbesserter Client für den Summarization Service mit Pre-Processing
 """
+import asyncio
+import hashlib
+import json
+import numpy as np
 import requests
 import logging
 import re
-from typing import Dict, Optional
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import settings
 
+# orjson ist optional, ohne wird die Standardbibliothek verwendet
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# httpx ist optional und wird nur für SUMMARIZATION_HTTP2 benötigt
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 logger = logging.getLogger(__name__)
 
+# Zuordnung der App-Log-Level zu logging-Leveln (Fallback ohne externen Logger)
+_LOG_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'SUCCESS': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR
+}
+
+# Retry-Grenzen für POST-Requests, gelten für die requests-Session und den httpx-Client (HTTP/2)
+_RETRY_LIMITS = {'total': 3, 'connect': 2, 'read': 1, 'status': 3}
+_RETRY_STATUS = frozenset([502, 503, 504])
+_RETRY_BACKOFF = 0.5  # s, verdoppelt sich mit jedem weiteren Versuch
+
+# Zeitfenster für gebündelte Zusammenfassungen über enqueue()
+BATCH_MAX_SIZE = 8
+BATCH_FLUSH_DELAY = 0.2  # s nach dem letzten Eintrag
+BATCH_MAX_DELAY = 1.0  # s nach dem ersten Eintrag
+
+# Vorkompilierte Muster für die Text-Bereinigung
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_LABEL = re.compile(r'\[([^]]+)\]:')
+_RE_SPEAKER = re.compile(r'(\[SPEAKER_\d+\]:)')
+_RE_NEWLINES = re.compile(r'\n+')
+
+# Keywords zur Erkennung des Konversationstyps
+_BUSINESS_KEYWORDS = frozenset(['meeting', 'projekt', 'task', 'deadline', 'budget', 'team', 'kunde', 'client'])
+_TECHNICAL_KEYWORDS = frozenset(['code', 'bug', 'feature', 'development', 'testing', 'deployment'])
+_PLANNING_KEYWORDS = frozenset(['plan', 'strategy', 'goal', 'objective', 'timeline', 'milestone'])
+_RE_KEYWORDS = re.compile(
+    '|'.join(map(re.escape, sorted(_BUSINESS_KEYWORDS | _TECHNICAL_KEYWORDS | _PLANNING_KEYWORDS))),
+    re.IGNORECASE
+)
+
+# Ab dieser Segmentanzahl werden Sprecher-Statistiken mit NumPy aggregiert
+_NUMPY_STATS_MIN_SEGMENTS = 500
+
+# Optionen für orjson: Nicht-String-Schlüssel und NumPy-Werte wie json.dumps akzeptieren
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson is not None else 0
+
+
+def _json_dumps(obj, sort_keys: bool = False) -> bytes:
+    """Serialisiert nach JSON (UTF-8), mit orjson falls verfügbar"""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        return orjson.dumps(obj, option=options, default=str)  # Dataclasses serialisiert orjson selbst
+    return json.dumps(obj, sort_keys=sort_keys, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def _json_default(obj):
+    """Fallback-Serialisierung für die Standardbibliothek"""
+    if isinstance(obj, SpeakerStats):
+        return obj.as_dict()
+    return str(obj)
+
+
+def _json_loads(data: bytes):
+    """Parst JSON, mit orjson falls verfügbar"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Einheitliche Sicht auf die Antwort von requests bzw. httpx
+_PostResponse = namedtuple('_PostResponse', ['status_code', 'ok'])
+
+
+@dataclass
+class SpeakerStats:
+    """
+    Statistik eines Sprechers für den Summarization Service
+
+    Feste Felder statt Dict pro Sprecher; wird erst beim Senden zum JSON-Objekt
+    (gleiche Schlüssel und Reihenfolge wie bisher, inkl. der *_str-Felder).
+    """
+    __slots__ = (
+        'total_time', 'word_count', 'segment_count', 'avg_words_per_segment', 'time_percentage',
+        'words_per_minute', 'participation_level', 'total_time_str', 'time_percentage_str',
+        'words_per_minute_str', 'avg_words_per_segment_str'
+    )
+
+    total_time: float
+    word_count: int
+    segment_count: int
+    avg_words_per_segment: float
+    time_percentage: float
+    words_per_minute: float
+    participation_level: str
+    # FIX: Numerische Werte zusätzlich als Strings
+    total_time_str: str
+    time_percentage_str: str
+    words_per_minute_str: str
+    avg_words_per_segment_str: str
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# Punkte für vorhandene Felder im Qualitätsscore (inkl. Bonus-Felder)
+_QUALITY_SCORE_FIELDS = (
+    ('participants', 15),
+    ('sentiment', 5),
+    ('next_steps', 10),
+    ('open_questions', 5),
+    ('agreements_and_commitments', 5),
+    ('key_takeaways', 5),
+)
+
+# Version des Cache-Schlüssels, erhöhen wenn sich das Antwortformat des Service ändert
+SUMMARY_CACHE_VERSION = "v1"
+
+
+# Sekunden, für die ein erfolgreicher Health Check (oder Request) als gültig gilt
+HEALTH_CHECK_TTL = 60.0
+
+# Circuit Breaker: BREAKER_FAILURES Fehler innerhalb von BREAKER_WINDOW s pausieren den Service
+BREAKER_FAILURES = 3
+BREAKER_WINDOW = 60.0
+BREAKER_COOLDOWN = 30.0
+
+
+class _CircuitOpenError(Exception):
+    """Service wird nach wiederholten Fehlern vorübergehend nicht angefragt"""
+
+
+class _SummaryCache:
+    """Kleiner thread-sicherer TTL-Cache (LRU) für Antworten des Summarization Service"""
+
+    __slots__ = ('maxsize', 'ttl', '_entries', '_lock', '_key_locks')
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    @contextmanager
+    def key_lock(self, key: str):
+        """Serialisiert Anfragen für denselben Schlüssel, damit nur eine den Service aufruft"""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
 
 class SummarizationClient:
     """Verbesserter Client für die Kommunikation mit dem Summarization Service"""
 
+    # Feste Attributliste: kein __dict__ pro Instanz, schnellerer Attributzugriff
+    __slots__ = (
+        'service_url', 'logger', '_health_ok_until', '_session', '_summary_cache',
+        '_batch_supported', '_batch_lock', '_pending', '_batch_started', '_batch_timer',
+        '_breaker', '_breaker_lock', '_http2'
+    )
+
     def __init__(self, service_url: str = None, logger=None):
         # Verwende die URL aus settings.py, wenn keine explizite URL übergeben wurde
         self.service_url = service_url if service_url is not None else settings.SUMMARIZATION_SERVICE_URL
         self.logger = logger
-        self._health_check_done = False
+        self._health_ok_until = 0.0  # Health Check gilt bis zu diesem Zeitpunkt (time.monotonic)
+        self._session = self._create_session()
+        self._http2 = self._create_http2_client()
+        self._summary_cache = _SummaryCache(settings.SUMMARY_CACHE_SIZE, settings.SUMMARY_CACHE_TTL)
+
+        # Gebündelte Zusammenfassungen (None = noch nicht bekannt, ob der Service /summarize/batch kennt)
+        self._batch_supported = None
+        self._batch_lock = threading.Lock()
+        self._pending = []
+        self._batch_started = None
+        self._batch_timer = None
+
+        # Circuit Breaker: nach wiederholten Fehlern den Service kurz nicht mehr anfragen
+        self._breaker = {'failures': 0, 'window_start': 0.0, 'open_until': 0.0}
+        self._breaker_lock = threading.Lock()
+
+    def _create_session(self):
+        """Erstellt eine Session mit Connection-Pooling (Keep-Alive) für den Service"""
+        session = requests.Session()
+        session.headers['Content-Type'] = 'application/json'
+
+        # Retry-Strategie für kurze Ausfälle (Gateway-Fehler, Verbindungsabbrüche)
+        retry_kwargs = dict(
+            **_RETRY_LIMITS,
+            status_forcelist=_RETRY_STATUS,
+            backoff_factor=_RETRY_BACKOFF,
+            respect_retry_after_header=True,
+            raise_on_status=False  # Letzte Fehler-Antwort normal auswerten
+        )
+        try:
+            retry_strategy = Retry(allowed_methods=frozenset(['GET', 'POST']), **retry_kwargs)
+        except TypeError:
+            # Fallback für ältere urllib3-Version
+            retry_strategy = Retry(method_whitelist=frozenset(['GET', 'POST']), **retry_kwargs)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry_strategy)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def _create_http2_client(self):
+        """
+        Erstellt optional einen httpx-Client mit HTTP/2 für die POST-Requests
+
+        Mehrere gleichzeitige Zusammenfassungen teilen sich dann eine Verbindung.
+        Ohne SUMMARIZATION_HTTP2 oder ohne httpx[http2] wird die requests-Session verwendet.
+        """
+        if not settings.SUMMARIZATION_HTTP2:
+            return None
+        if httpx is None:
+            self._log("⚠️ SUMMARIZATION_HTTP2 gesetzt, aber httpx ist nicht installiert", "WARNING")
+            return None
+
+        try:
+            return httpx.Client(
+                http2=True,
+                headers={'Content-Type': 'application/json'},
+                limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+                timeout=httpx.Timeout(60, connect=5)
+            )
+        except ImportError:
+            # http2=True benötigt das Paket h2
+            self._log("⚠️ SUMMARIZATION_HTTP2 gesetzt, aber h2 ist nicht installiert", "WARNING")
+            return None
+
+    def close(self):
+        """Schließt die Session und gibt die offenen Verbindungen frei"""
+        self._session.close()
+        if self._http2 is not None:
+            self._http2.close()
 
     def _log(self, message: str, level: str = "INFO"):
         """Logging-Hilfsmethode"""
         if self.logger:
             self.logger.log_message(message, level)
+        elif logger.hasHandlers():
+            # Nur wenn die Anwendung logging konfiguriert hat, sonst gingen INFO-Meldungen verloren
+            logger.log(_LOG_LEVELS.get(level, logging.INFO), '%s', message)
         else:
             print(f"[{level}] {message}")
 
     def check_service_health(self) -> bool:
         """Überprüft, ob der Summarization Service verfügbar ist"""
         try:
-            response = requests.get(f"{self.service_url}/health", timeout=5)
+            response = self._session.get(f"{self.service_url}/health", timeout=5)
             if response.ok:
-                health_data = response.json()
+                health_data = _json_loads(response.content)
                 status = health_data.get('status', 'unknown')
 
                 if status == 'healthy':
                     self._log("✅ Summarization Service ist verfügbar", "SUCCESS")
-                    self._health_check_done = True
+                    self._health_ok_until = time.monotonic() + HEALTH_CHECK_TTL
                     return True
                 elif status == 'degraded':
                     self._log("⚠️ Summarization Service läuft, aber mit Problemen", "WARNING")
@@ -67,26 +341,330 @@ class SummarizationClient:
             Dictionary mit detaillierter Zusammenfassung oder None bei Fehler
         """
         try:
-            # Führe Health Check durch falls noch nicht gemacht
-            if not self._health_check_done:
+            # Health Check nur, wenn der Service nicht kürzlich erreichbar war
+            if not self._health_verified():
                 if not self.check_service_health():
                     return None
 
             # Pre-Processing der Daten für bessere Ergebnisse
             processed_data = self._preprocess_transcript_data(transcript_data)
+        except Exception as e:
+            self._log(f"❌ Unerwarteter Fehler bei Zusammenfassung: {str(e)}", "ERROR")
+            return None
+
+        return self._request_summary(processed_data, transcript_data)
+
+    def _health_verified(self) -> bool:
+        """True, wenn der Service innerhalb der letzten HEALTH_CHECK_TTL Sekunden erreichbar war"""
+        return time.monotonic() < self._health_ok_until
+
+    async def acheck_service_health(self) -> bool:
+        """Asynchrone Variante von check_service_health (blockierender Request im Thread-Pool)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.check_service_health)
+
+    async def asummarize_conversation(self, transcript_data: Dict) -> Optional[Dict]:
+        """
+        Asynchrone Variante von summarize_conversation
+
+        Mehrere Aufrufe können mit asyncio.gather parallel laufen, die Requests
+        teilen sich dabei den Connection-Pool der Session.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            # Pre-Processing läuft parallel zum Health Check, beide sind unabhängig
+            preprocessing = loop.run_in_executor(None, self._preprocess_transcript_data, transcript_data)
+            if self._health_verified():
+                processed_data = await preprocessing
+            else:
+                healthy, processed_data = await asyncio.gather(self.acheck_service_health(), preprocessing)
+                if not healthy:
+                    return None
+        except Exception as e:
+            self._log(f"❌ Unerwarteter Fehler bei Zusammenfassung: {str(e)}", "ERROR")
+            return None
+
+        return await loop.run_in_executor(None, self._request_summary, processed_data, transcript_data)
+
+    def summarize_batch(self, transcripts: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Fasst mehrere Transkripte gleichzeitig zusammen
+
+        Nur für synchronen Code: die Methode startet mit asyncio.run eine
+        eigene Event-Loop. Aus async Code stattdessen asummarize_conversation
+        verwenden und die Aufrufe mit asyncio.gather bündeln.
+
+        Args:
+            transcripts: Liste von Transkriptionsdaten
+
+        Returns:
+            Liste der Zusammenfassungen (None bei Fehler) in derselben Reihenfolge
+
+        Raises:
+            RuntimeError: Wenn bereits eine Event-Loop im aktuellen Thread läuft
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "summarize_batch kann nicht innerhalb einer laufenden Event-Loop aufgerufen werden; "
+                "stattdessen asyncio.gather(*(client.asummarize_conversation(t) for t in transcripts)) verwenden"
+            )
+
+        if not transcripts:
+            return []
+
+        async def _gather():
+            # Ein Worker pro Transkript, begrenzt durch die Größe des Connection-Pools
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=min(len(transcripts), 16)))
+            return await asyncio.gather(*(self.asummarize_conversation(t) for t in transcripts))
+
+        return asyncio.run(_gather())
+
+    def summarize_conversations_batch(self, items: List[Dict], max_batch: int = BATCH_MAX_SIZE) -> List[Optional[Dict]]:
+        """
+        Fasst mehrere Transkripte mit möglichst wenigen Requests zusammen
+
+        Bis zu max_batch Transkripte werden gemeinsam an /summarize/batch gesendet.
+        Unterstützt der Service den Endpunkt nicht, werden sie einzeln (parallel) gesendet.
+
+        Returns:
+            Liste der Zusammenfassungen (None bei Fehler) in derselben Reihenfolge
+        """
+        if not items:
+            return []
+
+        if not self._health_verified():
+            if not self.check_service_health():
+                return [None] * len(items)
+
+        results = []
+        for start in range(0, len(items), max_batch):
+            chunk = items[start:start + max_batch]
+            chunk_results = self._request_summary_batch(chunk) if self._batch_supported is not False else None
+            if chunk_results is None:
+                chunk_results = self.summarize_batch(chunk)
+            results.extend(chunk_results)
+
+        return results
+
+    def enqueue(self, transcript_data: Dict, callback):
+        """
+        Reiht ein Transkript für eine gebündelte Zusammenfassung ein
+
+        Der Batch wird BATCH_FLUSH_DELAY nach dem letzten Eintrag gesendet, spätestens
+        BATCH_MAX_DELAY nach dem ersten oder sobald BATCH_MAX_SIZE Einträge vorliegen.
+        callback(result) wird pro Transkript aus dem Timer-Thread aufgerufen.
+        """
+        with self._batch_lock:
+            now = time.monotonic()
+            self._pending.append((transcript_data, callback))
+            if self._batch_started is None:
+                self._batch_started = now
+
+            if self._batch_timer is not None:
+                self._batch_timer.cancel()
+
+            if len(self._pending) >= BATCH_MAX_SIZE:
+                delay = 0
+            else:
+                delay = min(BATCH_FLUSH_DELAY, max(0, self._batch_started + BATCH_MAX_DELAY - now))
+
+            self._batch_timer = threading.Timer(delay, self._flush_pending)
+            self._batch_timer.daemon = True
+            self._batch_timer.start()
+
+    def _flush_pending(self):
+        """Sendet alle eingereihten Transkripte als Batch und ruft die Callbacks auf"""
+        with self._batch_lock:
+            pending = self._pending
+            self._pending = []
+            self._batch_started = None
+            self._batch_timer = None
+
+        if not pending:
+            return
+
+        results = self.summarize_conversations_batch([transcript for transcript, _ in pending])
+        for (_, callback), result in zip(pending, results):
+            try:
+                callback(result)
+            except Exception as e:
+                self._log(f"❌ Fehler im Zusammenfassungs-Callback: {str(e)}", "ERROR")
+
+    def _post_json(self, path: str, payload, timeout: float):
+        """
+        Sendet payload als JSON und liefert die Antwort als Bytes
+
+        Der Body wird als Bytes weitergegeben und direkt geparst (kein Umweg über
+        response.text).
+
+        Returns:
+            Tuple aus _PostResponse (status_code, ok) und Body-Bytes
+
+        Raises:
+            _CircuitOpenError: wenn der Service nach wiederholten Fehlern pausiert wird
+        """
+        if time.monotonic() < self._breaker['open_until']:
+            raise _CircuitOpenError()
+
+        try:
+            if self._http2 is not None:
+                response, body = self._post_json_http2(path, payload, timeout)
+            else:
+                raw_response = self._session.post(
+                    f"{self.service_url}{path}", data=_json_dumps(payload), timeout=timeout)
+                body = raw_response.content
+                response = _PostResponse(raw_response.status_code, raw_response.ok)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            self._record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self._record_failure()
+        else:
+            self._record_success()
+            if response.ok:
+                # Erfolgreiche Antwort bestätigt zugleich die Erreichbarkeit des Service
+                self._health_ok_until = time.monotonic() + HEALTH_CHECK_TTL
+        return response, body
+
+    def _post_json_http2(self, path: str, payload, timeout: float):
+        """
+        POST über den httpx-Client, Fehler werden auf die requests-Exceptions abgebildet
+
+        httpx kennt keine Retry-Strategie wie urllib3, daher wird hier mit denselben
+        Grenzen (_RETRY_LIMITS) wiederholt wie bei der requests-Session.
+        """
+        url = f"{self.service_url}{path}"
+        body = _json_dumps(payload)
+        remaining = dict(_RETRY_LIMITS)
+        retry_number = 0
+
+        while True:
+            error = None
+            try:
+                response = self._http2.post(url, content=body, timeout=timeout)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                kind, error = 'connect', e
+            except (httpx.TimeoutException, httpx.ReadError, httpx.RemoteProtocolError) as e:
+                kind, error = 'read', e
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+            else:
+                if response.status_code not in _RETRY_STATUS:
+                    return _PostResponse(response.status_code, response.status_code < 400), response.content
+                kind = 'status'
+
+            remaining['total'] -= 1
+            remaining[kind] -= 1
+            if remaining['total'] < 0 or remaining[kind] < 0:
+                if error is None:
+                    # Letzte Fehler-Antwort normal auswerten (wie raise_on_status=False)
+                    return _PostResponse(response.status_code, False), response.content
+                if isinstance(error, httpx.TimeoutException):
+                    raise requests.exceptions.Timeout(str(error)) from error
+                raise requests.exceptions.ConnectionError(str(error)) from error
+
+            retry_number += 1
+            delay = _RETRY_BACKOFF * (2 ** (retry_number - 1))
+            if error is None:
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+            time.sleep(delay)
+
+    def _record_failure(self):
+        """Zählt einen Fehler, öffnet den Circuit Breaker bei zu vielen Fehlern im Zeitfenster"""
+        self._health_ok_until = 0.0  # Beim nächsten Aufruf erneut prüfen
+        with self._breaker_lock:
+            now = time.monotonic()
+            if now - self._breaker['window_start'] > BREAKER_WINDOW:
+                self._breaker['failures'] = 0
+                self._breaker['window_start'] = now
+
+            self._breaker['failures'] += 1
+            if self._breaker['failures'] >= BREAKER_FAILURES:
+                self._breaker['open_until'] = now + BREAKER_COOLDOWN
+                self._breaker['failures'] = 0
+                self._log(f"⚠️ Summarization Service {BREAKER_COOLDOWN:.0f}s pausiert nach wiederholten Fehlern",
+                          "WARNING")
+
+    def _record_success(self):
+        """Setzt den Fehlerzähler nach einer erfolgreichen Antwort zurück"""
+        with self._breaker_lock:
+            self._breaker['failures'] = 0
+
+    def _request_summary_batch(self, items: List[Dict]) -> Optional[List[Optional[Dict]]]:
+        """Sendet einen Batch an /summarize/batch, None wenn der Service den Endpunkt nicht kennt"""
+        try:
+            processed_items = [self._preprocess_transcript_data(item) for item in items]
+
+            self._log(f"Sende {len(items)} Transkripte gebündelt an Summarization Service...", "INFO")
+            response, body = self._post_json("/summarize/batch", {'items': processed_items}, timeout=120)
+
+            if response.status_code in (404, 405):
+                self._log("Batch-Endpunkt nicht verfügbar, sende Transkripte einzeln", "WARNING")
+                self._batch_supported = False
+                return None
+            self._batch_supported = True
+
+            if not response.ok:
+                self._log(f"Fehler bei Batch-Zusammenfassung: {response.status_code}", "ERROR")
+                return [None] * len(items)
+
+            summaries = _json_loads(body).get('results', [])
+            summaries += [None] * (len(items) - len(summaries))
 
+            self._log(f"✅ {len(items)} Zusammenfassungen gebündelt erhalten", "SUCCESS")
+            return [self._postprocess_summary(summary, item) if summary else None
+                    for summary, item in zip(summaries, items)]
+
+        except _CircuitOpenError:
+            self._log("⚠️ Summarization Service pausiert, Batch wird übersprungen", "WARNING")
+        except requests.exceptions.Timeout:
+            self._log("⏱️ Timeout bei Batch-Zusammenfassung", "ERROR")
+        except requests.exceptions.ConnectionError:
+            self._log("❌ Verbindungsfehler zu Summarization Service", "ERROR")
+        except Exception as e:
+            self._log(f"❌ Unerwarteter Fehler bei Batch-Zusammenfassung: {str(e)}", "ERROR")
+        return [None] * len(items)
+
+    def _request_summary(self, processed_data: Dict, transcript_data: Dict) -> Optional[Dict]:
+        """Liefert die Zusammenfassung aus dem Cache oder fragt den Service an (Cache-Aside)"""
+        cache_key = self._cache_key(processed_data)
+        with self._summary_cache.key_lock(cache_key):
+            cached = self._summary_cache.get(cache_key)
+            if cached is not None:
+                self._log("✅ Zusammenfassung aus dem Cache geladen", "SUCCESS")
+                return self._postprocess_summary(_json_loads(cached), transcript_data)
+
+            return self._fetch_summary(processed_data, transcript_data, cache_key)
+
+    def _cache_key(self, processed_data: Dict) -> str:
+        """Stabiler Hash der vorverarbeiteten Daten als Cache-Schlüssel"""
+        payload = _json_dumps(processed_data, sort_keys=True)
+        digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        return f"{SUMMARY_CACHE_VERSION}:{digest}"
+
+    def _fetch_summary(self, processed_data: Dict, transcript_data: Dict, cache_key: str) -> Optional[Dict]:
+        """Sendet die vorverarbeiteten Daten an den Service und verarbeitet die Antwort"""
+        try:
             self._log("Sende optimierte Daten an Summarization Service...", "INFO")
 
             # Verwende den /summarize Endpunkt für vollständige Zusammenfassung
-            response = requests.post(
-                f"{self.service_url}/summarize",
-                json=processed_data,
-                timeout=60,  # Erhöhter Timeout für detailliertere Verarbeitung
-                headers={'Content-Type': 'application/json'}
+            response, body = self._post_json(
+                "/summarize",
+                processed_data,
+                timeout=60  # Erhöhter Timeout für detailliertere Verarbeitung
             )
 
             if response.ok:
-                result = response.json()
+                result = _json_loads(body)
+                self._summary_cache.set(cache_key, body)
 
                 # Post-Processing der Ergebnisse
                 enhanced_result = self._postprocess_summary(result, transcript_data)
@@ -96,7 +674,7 @@ class SummarizationClient:
             else:
                 error_msg = f"Fehler bei Zusammenfassung: {response.status_code}"
                 try:
-                    error_detail = response.json().get('detail', 'Unbekannter Fehler')
+                    error_detail = _json_loads(body).get('detail', 'Unbekannter Fehler')
                     error_msg += f" - {error_detail}"
                 except:
                     pass
@@ -104,6 +682,9 @@ class SummarizationClient:
                 self._log(error_msg, "ERROR")
                 return None
 
+        except _CircuitOpenError:
+            self._log("⚠️ Summarization Service pausiert nach wiederholten Fehlern", "WARNING")
+            return None
         except requests.exceptions.Timeout:
             self._log("⏱️ Timeout bei Zusammenfassung (längere Verarbeitung)", "ERROR")
             return None
@@ -118,38 +699,41 @@ class SummarizationClient:
         """
         Pre-Processing der Transkriptionsdaten für bessere Zusammenfassungen
         """
-        processed_data = transcript_data.copy()
+        # Nur abgeleitete bzw. überschriebene Felder sammeln, das Original bleibt unverändert
+        derived = {}
+        labeled_text = transcript_data.get('labeled_text')
+        segments = transcript_data.get('segments') or []
 
         # 1. Verbessere den Text für bessere Analyse
-        if 'labeled_text' in processed_data and processed_data['labeled_text']:
+        if labeled_text:
             # Bereinige und strukturiere den Text
-            cleaned_text = self._clean_transcript_text(processed_data['labeled_text'])
-            processed_data['labeled_text'] = cleaned_text
-            processed_data['cleaned_for_analysis'] = True
+            labeled_text = self._clean_transcript_text(labeled_text)
+            derived['labeled_text'] = labeled_text
+            derived['cleaned_for_analysis'] = True
 
         # 2. Füge Segment-Analyse hinzu
-        if 'segments' in processed_data and processed_data['segments']:
+        if segments:
             # Berechne Sprecher-Statistiken
-            speaker_stats = self._calculate_speaker_statistics(processed_data['segments'])
-            processed_data['speaker_statistics'] = speaker_stats
+            derived['speaker_statistics'] = self._calculate_speaker_statistics(segments)
 
             # Identifiziere längere Monologe
-            long_segments = [seg for seg in processed_data['segments'] if seg.get('duration', 0) > 10]
-            if long_segments:
-                processed_data['has_long_segments'] = True
-                processed_data['long_segment_count'] = len(long_segments)
+            long_segment_count = sum(1 for seg in segments if seg.get('duration', 0) > 10)
+            if long_segment_count:
+                derived['has_long_segments'] = True
+                derived['long_segment_count'] = long_segment_count
 
         # 3. Füge Kontext-Informationen hinzu
-        processed_data['analysis_context'] = {
-            'total_speakers': len(set(seg.get('speaker', 'UNKNOWN') for seg in processed_data.get('segments', []))),
-            'estimated_duration': f"{self._estimate_conversation_duration(processed_data.get('segments', [])):.1f}",
+        text_for_detection = {'labeled_text': labeled_text, 'full_text': transcript_data.get('full_text', '')}
+        derived['analysis_context'] = {
+            'total_speakers': len(set(seg.get('speaker', 'UNKNOWN') for seg in segments)),
+            'estimated_duration': f"{self._estimate_conversation_duration(segments):.1f}",
             # Als String
-            'conversation_type': self._detect_conversation_type(processed_data),
+            'conversation_type': self._detect_conversation_type(text_for_detection),
             'language': 'german',  # Für bessere deutsche Analyse
             'detailed_analysis_requested': True
         }
 
-        return processed_data
+        return {**transcript_data, **derived}
 
     def _clean_transcript_text(self, text: str) -> str:
         """Bereinigt und strukturiert den Transkriptions-Text"""
@@ -157,64 +741,111 @@ class SummarizationClient:
             return text
 
         # Entferne übermäßige Leerzeichen
-        text = re.sub(r'\s+', ' ', text)
+        text = _RE_WHITESPACE.sub(' ', text)
 
         # Verbessere Sprecher-Labels
-        text = re.sub(r'\[([^]]+)\]:', r'\n[\1]:', text)
+        text = _RE_LABEL.sub(r'\n[\1]:', text)
 
         # Füge Absätze zwischen Sprechern hinzu
-        text = re.sub(r'(\[SPEAKER_\d+\]:)', r'\n\1', text)
+        text = _RE_SPEAKER.sub(r'\n\1', text)
 
         # Entferne überflüssige Newlines
-        text = re.sub(r'\n+', '\n', text)
+        text = _RE_NEWLINES.sub('\n', text)
 
         return text.strip()
 
     def _calculate_speaker_statistics(self, segments: list) -> dict:
         """Berechnet detaillierte Sprecher-Statistiken"""
-        speaker_stats = {}
+        if len(segments) >= _NUMPY_STATS_MIN_SEGMENTS:
+            columns, total_duration = self._speaker_columns_numpy(segments)
+        else:
+            columns, total_duration = self._speaker_columns(segments)
+        return self._finalize_speaker_statistics(columns, total_duration)
+
+    def _speaker_columns(self, segments: list):
+        """Aggregiert Sprechzeit, Wörter und Segmente spaltenweise (ein Listeneintrag pro Sprecher)"""
+        speaker_index = {}
+        total_times = []
+        word_counts = []
+        segment_counts = []
         total_duration = 0
 
         for segment in segments:
-            speaker = segment.get('speaker', 'UNKNOWN')
-            duration = segment.get('duration', 0)
-            text = segment.get('text', '')
-            word_count = len(text.split()) if text else 0
-
-            if speaker not in speaker_stats:
-                speaker_stats[speaker] = {
-                    'total_time': 0,
-                    'word_count': 0,
-                    'segment_count': 0,
-                    'avg_words_per_segment': 0
-                }
-
-            speaker_stats[speaker]['total_time'] += duration
-            speaker_stats[speaker]['word_count'] += word_count
-            speaker_stats[speaker]['segment_count'] += 1
+            seg_get = segment.get
+            speaker = seg_get('speaker', 'UNKNOWN')
+            duration = seg_get('duration', 0)
+            text = seg_get('text')
+
+            idx = speaker_index.get(speaker)
+            if idx is None:
+                idx = speaker_index[speaker] = len(total_times)
+                total_times.append(0)
+                word_counts.append(0)
+                segment_counts.append(0)
+
+            total_times[idx] += duration
+            word_counts[idx] += len(text.split()) if text else 0
+            segment_counts[idx] += 1
             total_duration += duration
 
+        columns = {
+            'speaker': list(speaker_index),
+            'total_time': total_times,
+            'word_count': word_counts,
+            'segment_count': segment_counts
+        }
+        return columns, total_duration
+
+    def _speaker_columns_numpy(self, segments: list):
+        """Wie _speaker_columns für viele Segmente: Spalten extrahieren, Summen per np.bincount"""
+        n_segments = len(segments)
+
+        # Sprecher-IDs in Reihenfolge des ersten Auftretens (wie im Python-Pfad)
+        speaker_index = {}
+        ids = np.fromiter(
+            (speaker_index.setdefault(seg.get('speaker', 'UNKNOWN'), len(speaker_index)) for seg in segments),
+            dtype=np.intp, count=n_segments)
+        durations = np.fromiter((seg.get('duration', 0) for seg in segments), dtype=np.float64, count=n_segments)
+        word_counts = np.fromiter(
+            (len(text.split()) if text else 0 for text in (seg.get('text') for seg in segments)),
+            dtype=np.int64, count=n_segments)
+
+        n_speakers = len(speaker_index)
+        columns = {
+            'speaker': list(speaker_index),
+            'total_time': np.bincount(ids, weights=durations, minlength=n_speakers).tolist(),
+            'word_count': np.bincount(ids, weights=word_counts, minlength=n_speakers).astype(np.int64).tolist(),
+            'segment_count': np.bincount(ids, minlength=n_speakers).tolist()
+        }
+        return columns, float(durations.sum())
+
+    def _finalize_speaker_statistics(self, columns: dict, total_duration: float) -> Dict[str, SpeakerStats]:
+        """Erzeugt aus den Spalten die Sprecher-Statistiken für den Service (inkl. abgeleiteter Werte)"""
+        speaker_stats = {}
+
         # Berechne erweiterte Statistiken - ALLES ALS STRINGS
-        for speaker, stats in speaker_stats.items():
-            if stats['segment_count'] > 0:
-                stats['avg_words_per_segment'] = stats['word_count'] / stats['segment_count']
-                stats['time_percentage'] = (stats['total_time'] / total_duration * 100) if total_duration > 0 else 0
-                stats['words_per_minute'] = (stats['word_count'] / (stats['total_time'] / 60)) if stats[
-                                                                                                      'total_time'] > 0 else 0
-
-                # Klassifiziere Beteiligung
-                if stats['time_percentage'] > 40:
-                    stats['participation_level'] = 'hoch'
-                elif stats['time_percentage'] > 20:
-                    stats['participation_level'] = 'mittel'
-                else:
-                    stats['participation_level'] = 'niedrig'
+        for speaker, total_time, word_count, segment_count in zip(
+                columns['speaker'], columns['total_time'], columns['word_count'], columns['segment_count']):
+            time_percentage = (total_time / total_duration * 100) if total_duration > 0 else 0
+
+            # Klassifiziere Beteiligung
+            if time_percentage > 40:
+                participation_level = 'hoch'
+            elif time_percentage > 20:
+                participation_level = 'mittel'
+            else:
+                participation_level = 'niedrig'
 
+            avg_words_per_segment = word_count / segment_count
+            words_per_minute = (word_count / (total_time / 60)) if total_time > 0 else 0
+
+            speaker_stats[speaker] = SpeakerStats(
+                total_time, word_count, segment_count, avg_words_per_segment, time_percentage,
+                words_per_minute, participation_level,
                 # FIX: Konvertiere alle numerischen Werte zu Strings
-                stats['total_time_str'] = f"{stats['total_time']:.1f}"
-                stats['time_percentage_str'] = f"{stats['time_percentage']:.1f}"
-                stats['words_per_minute_str'] = f"{stats['words_per_minute']:.1f}"
-                stats['avg_words_per_segment_str'] = f"{stats['avg_words_per_segment']:.1f}"
+                format(total_time, '.1f'), format(time_percentage, '.1f'),
+                format(words_per_minute, '.1f'), format(avg_words_per_segment, '.1f')
+            )
 
         return speaker_stats
 
@@ -229,16 +860,12 @@ class SummarizationClient:
     def _detect_conversation_type(self, transcript_data: dict) -> str:
         """Erkennt den Typ der Konversation für kontextuelle Analyse"""
         text = transcript_data.get('labeled_text', '') or transcript_data.get('full_text', '')
-        text_lower = text.lower()
 
-        # Business-Keywords
-        business_keywords = ['meeting', 'projekt', 'task', 'deadline', 'budget', 'team', 'kunde', 'client']
-        technical_keywords = ['code', 'bug', 'feature', 'development', 'testing', 'deployment']
-        planning_keywords = ['plan', 'strategy', 'goal', 'objective', 'timeline', 'milestone']
-
-        business_count = sum(1 for keyword in business_keywords if keyword in text_lower)
-        technical_count = sum(1 for keyword in technical_keywords if keyword in text_lower)
-        planning_count = sum(1 for keyword in planning_keywords if keyword in text_lower)
+        # Ein Durchlauf über den Text, gezählt wird jedes gefundene Keyword einmal
+        found = set(match.group(0).lower() for match in _RE_KEYWORDS.finditer(text))
+        business_count = len(found & _BUSINESS_KEYWORDS)
+        technical_count = len(found & _TECHNICAL_KEYWORDS)
+        planning_count = len(found & _PLANNING_KEYWORDS)
 
         if business_count > technical_count and business_count > planning_count:
             return 'business_meeting'
@@ -257,12 +884,25 @@ class SummarizationClient:
         # Füge Original-Statistiken hinzu
         if 'segments' in original_data:
             segments = original_data['segments']
-            total_duration = self._estimate_conversation_duration(segments)
+
+            # Dauer, Sprecher und Wörter in einem Durchlauf über die Segmente
+            total_duration = 0
+            speakers = set()
+            total_words = 0
+            for seg in segments:
+                seg_get = seg.get
+                end = seg_get('end', 0)
+                if end > total_duration:
+                    total_duration = end
+                speakers.add(seg_get('speaker', 'UNKNOWN'))
+                text = seg_get('text')
+                if text:
+                    total_words += len(text.split())
 
             summary['conversation_metrics'] = {
                 'total_segments': len(segments),
-                'unique_speakers': len(set(seg.get('speaker', 'UNKNOWN') for seg in segments)),
-                'total_words': sum(len(seg.get('text', '').split()) for seg in segments),
+                'unique_speakers': len(speakers),
+                'total_words': total_words,
                 # FIX: Alle numerischen Werte als Strings
                 'estimated_duration_minutes': f"{total_duration / 60:.1f}",
                 'duration_estimate': f"{total_duration:.1f}s"
@@ -287,9 +927,8 @@ class SummarizationClient:
                 if 'statistics' in participant:
                     stats = participant['statistics']
                     # Konvertiere alle numerischen Werte zu Strings
-                    for key, value in stats.items():
-                        if isinstance(value, (int, float)):
-                            stats[key] = f"{value:.1f}"
+                    stats.update({key: format(value, '.1f') for key, value in stats.items()
+                                  if isinstance(value, (int, float))})
 
         return summary
 
@@ -330,42 +969,24 @@ class SummarizationClient:
 
     def _calculate_quality_score(self, summary: dict) -> int:
         """Berechnet einen Qualitätsscore für die Zusammenfassung (0-100)"""
-        score = 0
+        # Einfache Felder über die Punkte-Tabelle
+        score = sum(points for field, points in _QUALITY_SCORE_FIELDS if summary.get(field))
 
-        # Basis-Score für Vollständigkeit
-        if summary.get('summary', {}).get('main_points'):
-            score += 20
-            # Bonus für detaillierte Punkte
-            main_points = summary['summary']['main_points']
+        # Basis-Score für Vollständigkeit, Bonus für detaillierte Punkte
+        main_points = summary.get('summary', {}).get('main_points')
+        if main_points:
             avg_length = sum(len(point.split()) for point in main_points) / len(main_points)
-            if avg_length > 10:
-                score += 10
-
-        if summary.get('todos'):
-            score += 20
-            # Bonus für detaillierte To-Dos
-            for todo in summary['todos']:
-                if len(todo.get('task', '').split()) > 5:
-                    score += 2
-                if todo.get('deadline') != 'nicht spezifiziert':
-                    score += 2
-                if todo.get('assigned_to') != 'nicht zugewiesen':
-                    score += 2
-
-        if summary.get('participants'):
-            score += 15
-
-        if summary.get('sentiment'):
-            score += 5
-
-        if summary.get('next_steps'):
-            score += 10
-
-        # Bonus für zusätzliche Felder
-        bonus_fields = ['open_questions', 'agreements_and_commitments', 'key_takeaways']
-        for field in bonus_fields:
-            if summary.get(field):
-                score += 5
+            score += 20 + 10 * (avg_length > 10)
+
+        # Bonus für detaillierte To-Dos (je 2 Punkte pro erfülltem Kriterium)
+        todos = summary.get('todos')
+        if todos:
+            score += 20 + 2 * sum(
+                (len(todo.get('task', '').split()) > 5)
+                + (todo.get('deadline') != 'nicht spezifiziert')
+                + (todo.get('assigned_to') != 'nicht zugewiesen')
+                for todo in todos
+            )
 
         return min(score, 100)
 
@@ -4,45 +4,209 @@ Verbesserte WhisperX-basierte Verarbeitung mit robuster Fehlerbehandlung
 """
 import numpy as np
 import soundfile as sf
+import soxr
 import requests
+import ipaddress
 import io
 import json
+import mmap
+import struct
 import traceback
 import os
+import random
+import socket
 import time
 import subprocess
+import tempfile
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from urllib3.connection import HTTPConnection
 from config import settings
 
+# orjson ist optional, ohne wird die Standardbibliothek verwendet
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# PyAV ist optional (Komprimierung im Prozess statt FFmpeg-Subprozess)
+try:
+    import av
+except ImportError:
+    av = None
+
+# requests-toolbelt ist optional (Multipart-Body wird gestreamt statt komplett im Speicher aufgebaut)
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder, MultipartEncoderMonitor
+except ImportError:
+    MultipartEncoder = None
+    MultipartEncoderMonitor = None
+
+# Obergrenze für die Wartezeit zwischen Upload-Versuchen (Sekunden)
+MAX_BACKOFF = 8
+
+# Sprecher, zwischen denen ohne Diarization-Ergebnis bei Pausen gewechselt wird (Index = Sprecher-Bit)
+_ALTERNATING_SPEAKERS = ("SPEAKER_0", "SPEAKER_1")
+
+# Platzhalter "noch kein Sprecher" für den Sprecherwechsel in _create_labeled_transcription
+_NO_SPEAKER = object()
+
+# HTTP-Status, bei denen sich ein erneuter Upload lohnt (alle anderen 4xx/5xx: sofort abbrechen)
+RECOVERABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+# Erfolgreiche Health Checks gelten so lange (Sekunden)
+HEALTH_CACHE_TTL = 30
+
+# Zeitpunkt (time.monotonic) des letzten erfolgreichen Health Checks je URL, gilt für alle Instanzen
+_health_ok_at = {}
+
+# Frames pro Block beim blockweisen Lesen/Resamplen
+AUDIO_BLOCK_FRAMES = 1 << 20
+
+# Ab dieser Größe (MB) wird vor dem Upload einmalig zu 16 kHz Mono konvertiert
+PRECONVERT_MIN_MB = 2
+
+
+def _json_loads(data):
+    """Parst JSON, mit orjson falls verfügbar (orjson.JSONDecodeError erbt von json.JSONDecodeError)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _is_name_resolution_error(exc):
+    """Erkennt DNS-Fehler, die requests/urllib3 in einen ConnectionError verpacken"""
+    pending = [exc]
+    seen = set()
+    while pending:
+        err = pending.pop()
+        if err is None or id(err) in seen:
+            continue
+        seen.add(id(err))
+        if isinstance(err, socket.gaierror) or type(err).__name__ == 'NameResolutionError':
+            return True
+        pending.extend((getattr(err, 'reason', None), err.__cause__, err.__context__))
+        pending.extend(arg for arg in err.args if isinstance(arg, BaseException))
+    return False
+
+
+def _is_loopback_url(url):
+    """True, wenn die URL auf localhost bzw. eine Loopback-Adresse zeigt"""
+    host = urlparse(url).hostname
+    if not host:
+        return False
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _pcm16_wav_layout(data):
+    """
+    Liest das Layout einer 16-bit-PCM-WAV-Datei aus dem RIFF-Header
+
+    Returns:
+        Tuple (channels, sample_rate, data_offset, data_size) oder None bei anderen Formaten
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', data, pos)
+        body = pos + 8
+        if chunk_id == b'fmt ' and chunk_size >= 16:
+            fmt = struct.unpack_from('<HHIIHH', data, body)
+        elif chunk_id == b'data':
+            # Nur unkomprimiertes PCM (Format-Tag 1) mit 16 Bit
+            if fmt is None or fmt[0] != 1 or fmt[5] != 16:
+                return None
+            return fmt[1], fmt[2], body, min(chunk_size, len(data) - body)
+        pos = body + chunk_size + (chunk_size & 1)  # RIFF-Chunks sind auf gerade Längen aufgefüllt
+
+    return None
+
+
+def _pcm16_wav_header(channels, sample_rate, data_size):
+    """Erzeugt den 44-Byte-Header einer 16-bit-PCM-WAV-Datei"""
+    block_align = channels * 2
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, 1, channels,
+                       sample_rate, sample_rate * block_align, block_align, 16, b'data', data_size)
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter mit TCP_NODELAY und TCP-Keep-Alive auf allen Verbindungen"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        # default_socket_options enthält bereits TCP_NODELAY
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _downmix_int16(block):
+    """Mischt einen int16-Block (frames, channels) zu Mono, gerechnet in int32"""
+    channels = block.shape[1]
+    if channels == 1:
+        return block[:, 0]
+    if channels == 2:
+        return ((block[:, 0].astype(np.int32) + block[:, 1].astype(np.int32)) >> 1).astype(np.int16)
+    return (block.sum(axis=1, dtype=np.int32) // channels).astype(np.int16)
+
+
+def _float_to_int16(block):
+    """Skaliert einen float-Block in-place auf den int16-Bereich (gerundet, begrenzt statt übergelaufen)"""
+    np.multiply(block, 32767, out=block)
+    np.rint(block, out=block)
+    np.clip(block, -32768, 32767, out=block)
+    return block.astype(np.int16)
+
+
+def _resample_blocks(blocks, in_rate, out_rate):
+    """
+    Resampelt einen Strom von float32-Mono-Blöcken mit soxr
+
+    Der ResampleStream hält den Filterzustand zwischen den Blöcken, das Ergebnis
+    entspricht dem Resampling des ganzen Signals.
+    """
+    stream = soxr.ResampleStream(in_rate, out_rate, 1, dtype='float32', quality='HQ')
+    for block in blocks:
+        resampled = stream.resample_chunk(block)
+        if len(resampled):
+            yield resampled
+    resampled = stream.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+    if len(resampled):
+        yield resampled
+
 
 class WhisperXProcessor:
     def __init__(self, logger=None):
         self.logger = logger
         self.session = self._create_session()
 
+        # Läuft der Server auf demselben Rechner (localhost)?
+        self._is_loopback = _is_loopback_url(settings.WHISPERX_API_URL)
+
     def _create_session(self):
         """Erstellt eine Session mit urllib3 2.x kompatiblen Einstellungen"""
         session = requests.Session()
-
-        # Retry-Strategie (angepasst basierend auf Tests)
-        try:
-            retry_strategy = Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[500, 502, 503, 504],
-                allowed_methods=["POST"]
-            )
-        except TypeError:
-            # Fallback für ältere urllib3-Version
-            retry_strategy = Retry(
-                total=3,
-                backoff_factor=1,
-                status_forcelist=[500, 502, 503, 504],
-                method_whitelist=["POST"]
-            )
-
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        session.headers.update({
+            'Connection': 'keep-alive',
+            'User-Agent': 'ATA-AudioApp/1.0'
+        })
+        session.stream = False
+
+        # Pool groß genug für parallele Chunk-Uploads über dieselbe Session
+        pool_size = max(16, settings.WHISPERX_PARALLEL_CHUNKS)
+        # Keine Retries auf Adapter-Ebene: die Upload-Schleife in _process_standard_buffer
+        # entscheidet allein über Wiederholungen (sonst bis zu 3 x 3 Versuche pro Upload)
+        adapter = _KeepAliveAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
@@ -57,9 +221,25 @@ class WhisperXProcessor:
 
     # audio/whisperx_processor.py - Server Health Monitoring
 
+    def _health_url(self):
+        return settings.WHISPERX_API_URL.replace('/transcribe', '/health')
+
+    def _health_recently_ok(self, health_url):
+        """True, wenn der Server innerhalb der letzten HEALTH_CACHE_TTL Sekunden gesund war"""
+        if self._is_loopback and settings.WHISPERX_SKIP_HEALTHCHECK_LOCAL:
+            return True
+        ok_at = _health_ok_at.get(health_url)
+        return ok_at is not None and time.monotonic() - ok_at < HEALTH_CACHE_TTL
+
+    def _invalidate_health(self):
+        """Verwirft den gecachten Health-Status nach einem fehlgeschlagenen Request"""
+        _health_ok_at.pop(self._health_url(), None)
+
     def _check_server_health(self):
         """Erweiterte Server-Health-Prüfung"""
-        health_url = settings.WHISPERX_API_URL.replace('/transcribe', '/health')
+        health_url = self._health_url()
+        if self._health_recently_ok(health_url):
+            return True
 
         try:
             self._log("Checking server health...", "INFO")
@@ -71,19 +251,19 @@ class WhisperXProcessor:
 
             if resp.ok:
                 try:
-                    health_data = resp.json()
+                    health_data = _json_loads(resp.content)
                     device = health_data.get('device', 'unknown')
                     self._log(f"Server healthy (device: {device}, latency: {latency:.2f}s)", "SUCCESS")
 
                     # Warnung bei hoher Latenz
                     if latency > 1.0:
                         self._log(f"High server latency detected: {latency:.2f}s", "WARNING")
-
-                    return True
                 except:
                     # Auch OK, wenn JSON nicht parsebar ist
                     self._log("Server responds but health format unexpected", "WARNING")
-                    return True
+
+                _health_ok_at[health_url] = time.monotonic()
+                return True
             else:
                 self._log(f"Server health check failed: {resp.status_code}", "WARNING")
                 return False
@@ -98,8 +278,14 @@ class WhisperXProcessor:
             self._log(f"Health check failed: {e}", "ERROR")
             return False
 
-    def process_complete_audio(self, audio_file_path):
-        """Hauptmethode mit Health-Check"""
+    def process_complete_audio(self, audio_file_path, verbose=True):
+        """
+        Hauptmethode mit Health-Check
+
+        Args:
+            audio_file_path: Pfad zur Audio-Datei
+            verbose: False unterdrückt die Fortschrittsmeldungen pro Request (z.B. für Batch-Jobs)
+        """
         try:
             # Prüfe Datei
             if not os.path.exists(audio_file_path):
@@ -112,18 +298,22 @@ class WhisperXProcessor:
             self._log(f"Processing audio file: {file_size / 1024 / 1024:.2f} MB", "INFO")
 
             # Health Check vor Verarbeitung
+            timeout_hint = None
             if not self._check_server_health():
                 # Warte kurz und versuche erneut
                 self._log("Server not healthy, waiting 5s and retrying...", "INFO")
                 time.sleep(5)
 
                 if not self._check_server_health():
-                    # Gehe trotzdem weiter, aber mit veränderten Timeouts
+                    # Gehe trotzdem weiter, aber mit verdoppeltem Timeout nur für diesen Aufruf
                     self._log("Server still not responding to health checks, proceeding with caution", "WARNING")
-                    settings.WHISPERX_TIMEOUT *= 2  # Verdopple Timeout
+                    timeout_hint = settings.WHISPERX_TIMEOUT * 2
 
-            # Verarbeitung durchführen
-            return self._process_standard_file(audio_file_path)
+            # Verarbeitung durchführen; große Dateien optional in Chunks (Sprecher-Labels gelten dann nur je Chunk)
+            chunking_min_mb = settings.WHISPERX_CHUNKING_MIN_MB
+            if chunking_min_mb > 0 and file_size > chunking_min_mb * 1024 * 1024:
+                return self._process_large_file(audio_file_path, timeout_hint=timeout_hint, verbose=verbose)
+            return self._process_standard_file(audio_file_path, timeout_hint=timeout_hint, verbose=verbose)
 
         except Exception as e:
             self._log(f"Error in process_complete_audio: {str(e)}", "ERROR")
@@ -136,9 +326,14 @@ class WhisperXProcessor:
 
     def _check_api_health(self):
         """Überprüft, ob die WhisperX-API verfügbar ist"""
+        health_url = self._health_url()
+        if self._health_recently_ok(health_url):
+            return True
+
         try:
-            health_url = settings.WHISPERX_API_URL.replace('/transcribe', '/health')
             resp = self.session.get(health_url, timeout=5)
+            if resp.ok:
+                _health_ok_at[health_url] = time.monotonic()
             return resp.ok
         except:
             return False
@@ -148,9 +343,8 @@ class WhisperXProcessor:
         try:
             self._log("Komprimiere Audio-Datei für API-Upload...", "INFO")
 
-            # Lade Audio und analysiere
-            audio, sr = sf.read(audio_file_path)
-            duration = len(audio) / sr
+            # Dauer aus dem Header lesen, ohne die Samples zu decodieren
+            duration = sf.info(audio_file_path).duration
 
             # Berechne Ziel-Bitrate basierend auf gewünschter Dateigröße
             target_size_bytes = target_size_mb * 1024 * 1024
@@ -160,7 +354,7 @@ class WhisperXProcessor:
             self._log(f"Ziel-Bitrate: {target_bitrate} kbps", "INFO")
 
             # Verwende FFmpeg für effiziente Komprimierung
-            compressed_path = audio_file_path.replace('.wav', '_compressed.wav')
+            compressed_path = self._temp_wav_path('_compressed.wav')
 
             # FFmpeg-Befehl für optimale Komprimierung
             ffmpeg_cmd = [
@@ -173,43 +367,81 @@ class WhisperXProcessor:
                 compressed_path
             ]
 
+            if av is not None:
+                try:
+                    self._compress_with_pyav(audio_file_path, compressed_path)
+                    final_size = os.path.getsize(compressed_path)
+                    self._log(f"Komprimierung erfolgreich: {final_size / 1024 / 1024:.2f} MB", "SUCCESS")
+                    return compressed_path
+                except Exception as e:
+                    self._log(f"PyAV-Komprimierung fehlgeschlagen, verwende FFmpeg: {e}", "WARNING")
+
             try:
                 subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
                 final_size = os.path.getsize(compressed_path)
                 self._log(f"Komprimierung erfolgreich: {final_size / 1024 / 1024:.2f} MB", "SUCCESS")
                 return compressed_path
-            except subprocess.CalledProcessError:
-                # Fallback ohne FFmpeg
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                # Fallback ohne FFmpeg (fehlgeschlagen oder nicht installiert)
+                os.remove(compressed_path)
                 return self._fallback_compression(audio_file_path, target_size_mb)
 
         except Exception as e:
             self._log(f"Fehler bei Audio-Komprimierung: {e}", "WARNING")
             return audio_file_path
 
+    def _compress_with_pyav(self, audio_file_path, compressed_path):
+        """Konvertiert mit PyAV (libavcodec im Prozess) zu 16 kHz Mono 16-bit WAV"""
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=16000)
+
+        with av.open(audio_file_path) as source, av.open(compressed_path, 'w', format='wav') as target:
+            stream = target.add_stream('pcm_s16le', rate=16000, layout='mono')
+
+            for frame in source.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    target.mux(stream.encode(resampled))
+
+            # Resampler und Encoder leeren
+            for resampled in resampler.resample(None):
+                target.mux(stream.encode(resampled))
+            target.mux(stream.encode(None))
+
     def _fallback_compression(self, audio_file_path, target_size_mb):
         """Fallback-Komprimierung ohne FFmpeg"""
+        compressed_path = None
         try:
             self._log("Verwende Fallback-Komprimierung...", "INFO")
 
-            # Lade Audio und konvertiere
-            audio, sr = sf.read(audio_file_path)
+            compressed_path = self._temp_wav_path('_compressed.wav')
+
+            # Blockweise lesen und schreiben, die Datei wird nie komplett geladen
+            with sf.SoundFile(audio_file_path) as f:
+                sr = f.samplerate
+                target_sr = min(sr, 16000)
+                block_shape = (min(AUDIO_BLOCK_FRAMES, f.frames), f.channels)
 
-            # Reduziere Sample Rate falls nötig
-            if sr > 16000:
-                import librosa
-                audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
-                sr = 16000
+                # Die Blöcke werden in einen wiederverwendeten Puffer gelesen; jeder Block
+                # ist verarbeitet und geschrieben, bevor der nächste gelesen wird
+                if sr <= target_sr and f.subtype == 'PCM_16':
+                    # 16-bit PCM ohne Resampling: direkt als int16 zu Mono mischen, kein Umweg über float
+                    pcm_blocks = (_downmix_int16(block)
+                                  for block in f.blocks(out=np.empty(block_shape, dtype=np.int16)))
+                else:
+                    # Konvertiere zu Mono (float32 statt float64)
+                    mono_blocks = (block.mean(axis=1, dtype=np.float32)
+                                   for block in f.blocks(out=np.empty(block_shape, dtype=np.float32)))
 
-            # Konvertiere zu Mono falls Stereo
-            if len(audio.shape) > 1:
-                audio = np.mean(audio, axis=1)
+                    # Reduziere Sample Rate falls nötig
+                    if sr > target_sr:
+                        mono_blocks = _resample_blocks(mono_blocks, sr, target_sr)
 
-            # Reduziere Bit-Tiefe auf 16-bit integer für kleinere Dateien
-            audio = (audio * 32767).astype(np.int16)
+                    # Reduziere Bit-Tiefe auf 16-bit integer für kleinere Dateien
+                    pcm_blocks = (_float_to_int16(block) for block in mono_blocks)
 
-            # Speichere komprimierte Version
-            compressed_path = audio_file_path.replace('.wav', '_compressed.wav')
-            sf.write(compressed_path, audio, sr, subtype='PCM_16')
+                # Speichere komprimierte Version
+                with sf.SoundFile(compressed_path, 'w', target_sr, 1, 'PCM_16') as out:
+                    for block in pcm_blocks:
+                        out.write(block)
 
             final_size = os.path.getsize(compressed_path)
             self._log(f"Fallback-Komprimierung: {final_size / 1024 / 1024:.2f} MB", "INFO")
@@ -217,87 +449,140 @@ class WhisperXProcessor:
 
         except Exception as e:
             self._log(f"Fehler bei Fallback-Komprimierung: {e}", "ERROR")
+            if compressed_path and os.path.exists(compressed_path):
+                os.remove(compressed_path)
             return audio_file_path
 
+    def _temp_wav_path(self, suffix):
+        """
+        Legt eine leere temporäre Datei im System-Temp-Verzeichnis an
+
+        Unabhängig vom Quellpfad (kein str.replace auf '.wav'); die Datei gehört dem Aufrufer.
+        """
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tf:
+            return tf.name
+
     # audio/whisperx_processor.py - Verbesserte Retry-Logik
 
-    def _process_standard_file(self, audio_file_path):
+    def _process_standard_file(self, audio_file_path, timeout_hint=None, verbose=True):
         """Verarbeitet Standard-Dateien mit robuster Fehlerbehandlung"""
+        # Einmal vor der Retry-Schleife konvertieren: jeder Versuch sendet dann nur 16 kHz Mono
+        upload_path = audio_file_path
+        if self._needs_preconversion(audio_file_path):
+            upload_path = self._compress_audio(audio_file_path)
+
+        try:
+            with open(upload_path, "rb") as vf:
+                return self._process_standard_buffer(vf, os.path.basename(audio_file_path), timeout_hint,
+                                                     verbose=verbose)
+        finally:
+            if upload_path != audio_file_path and os.path.exists(upload_path):
+                os.remove(upload_path)
+
+    def _needs_preconversion(self, audio_file_path):
+        """True für größere Dateien, die nicht schon 16 kHz Mono sind (WhisperX rechnet ohnehin so)"""
+        if os.path.getsize(audio_file_path) <= PRECONVERT_MIN_MB * 1024 * 1024:
+            return False
+        try:
+            info = sf.info(audio_file_path)
+        except RuntimeError:
+            # Von libsndfile nicht lesbares Format: unverändert hochladen
+            return False
+        return info.samplerate != 16000 or info.channels != 1
+
+    def _process_standard_buffer(self, audio_buffer, file_name, timeout_hint=None, time_offset=0, verbose=True):
+        """
+        Sendet eine Audio-Datei aus einem Datei-Objekt (Datei oder BytesIO) an WhisperX
+
+        Args:
+            audio_buffer: Lesbares, seekbares Datei-Objekt mit WAV-Daten
+            file_name: Dateiname für den Upload
+            timeout_hint: Optionales Mindest-Timeout in Sekunden (z.B. bei unsicherem Server-Zustand)
+            time_offset: Wird zu allen Segment-Zeitstempeln addiert (Position des Chunks in Sekunden)
+            verbose: False unterdrückt die Fortschrittsmeldungen pro Request
+        """
         max_retries = 3
         base_delay = 2
         backoff_factor = 2.0
-        max_delay = 30
 
-        # Berechne Timeout basierend auf Dateigröße (30s per MB, mindestens 60s)
-        file_size_mb = os.path.getsize(audio_file_path) / (1024 * 1024)
-        timeout = max(60, int(30 + file_size_mb * 30))
+        # Berechne Timeout basierend auf Dateigröße (30s per MB, mindestens 60s bzw. timeout_hint)
+        file_size_mb = audio_buffer.seek(0, os.SEEK_END) / (1024 * 1024)
+        timeout = max(timeout_hint or 60, int(30 + file_size_mb * 30))
 
         self._log(f"Processing file: {file_size_mb:.2f} MB, Timeout: {timeout}s", "INFO")
 
         for attempt in range(max_retries):
-            # Berechne Retry-Delay mit exponential backoff
+            # Berechne Retry-Delay mit exponential backoff und "Full Jitter":
+            # zufällig zwischen 0 und der Obergrenze, damit Clients nicht gleichzeitig erneut anfragen
             if attempt > 0:
-                delay = min(base_delay * (backoff_factor ** (attempt - 1)), max_delay)
-                self._log(f"Waiting {delay}s before retry {attempt + 1}...", "INFO")
+                cap = min(base_delay * (backoff_factor ** (attempt - 1)), MAX_BACKOFF)
+                delay = random.uniform(0, cap)
+                self._log(f"Waiting {delay:.1f}s before retry {attempt + 1}...", "INFO")
                 time.sleep(delay)
 
             try:
-                with open(audio_file_path, "rb") as vf:
-                    files = {"file": (os.path.basename(audio_file_path), vf, "audio/wav")}
-                    data = {
-                        "language": settings.WHISPERX_LANGUAGE,
-                        "compute_type": settings.WHISPERX_COMPUTE_TYPE,
-                        "enable_diarization": str(settings.WHISPERX_ENABLE_DIARIZATION).lower(),
-                        "return_segments": "true",
-                        "return_word_timestamps": "true"
-                    }
+                # Jeder Versuch sendet die Daten wieder von Anfang an
+                audio_buffer.seek(0)
+                data = {
+                    "language": settings.WHISPERX_LANGUAGE,
+                    "compute_type": settings.WHISPERX_COMPUTE_TYPE,
+                    "enable_diarization": str(settings.WHISPERX_ENABLE_DIARIZATION).lower(),
+                    "return_segments": "true",
+                    "return_word_timestamps": "true"
+                }
+                file_field = (file_name, audio_buffer, "audio/wav")
+
+                if MultipartEncoder is not None:
+                    # Streaming-Upload mit bekannter Content-Length
+                    encoder = MultipartEncoder(fields={**data, "file": file_field})
+                    if settings.WHISPERX_UPLOAD_PROGRESS:
+                        encoder = MultipartEncoderMonitor(encoder, self._upload_progress_callback(file_name))
+                    request_kwargs = {'data': encoder, 'headers': {'Content-Type': encoder.content_type}}
+                else:
+                    request_kwargs = {'files': {"file": file_field}, 'data': data}
 
+                if verbose:
                     self._log(f"Sending file (attempt {attempt + 1}/{max_retries})...", "INFO")
 
-                    # Session für jeden Versuch neu erstellen, falls vorheriger fehlgeschlagen
-                    if attempt > 0:
-                        self.session = self._create_session()
-
-                    # Request mit progressiven Timeouts
-                    current_timeout = timeout + (attempt * 30)  # Erhöhe Timeout bei Retries
-
-                    resp = self.session.post(
-                        settings.WHISPERX_API_URL,
-                        files=files,
-                        data=data,
-                        timeout=(30, current_timeout),  # Connect-Timeout bleibt konstant
-                        stream=False,
-                        headers={
-                            'Connection': 'keep-alive',
-                            'User-Agent': 'ATA-AudioApp/1.0'
-                        }
-                    )
+                # Request mit progressiven Timeouts
+                current_timeout = timeout + (attempt * 30)  # Erhöhe Timeout bei Retries
+
+                resp = self.session.post(
+                    settings.WHISPERX_API_URL,
+                    timeout=(30, current_timeout),  # Connect-Timeout bleibt konstant
+                    **request_kwargs
+                )
 
                 # Erfolgreiche Antwort verarbeiten
                 if resp.ok:
                     self._log(f"Successfully received response from server", "SUCCESS")
-                    return self._parse_response(resp)
+                    return self._parse_response(resp, time_offset, verbose)
 
-                # Server-Fehler behandeln
-                if resp.status_code >= 500:
-                    # Server-Fehler: Retry lohnt sich
+                # Vorübergehende Fehler (5xx, 408, 429): Retry lohnt sich
+                if resp.status_code in RECOVERABLE_STATUS:
                     self._log(f"Server error {resp.status_code}, will retry", "WARNING")
+                    self._invalidate_health()
                     continue
-                elif resp.status_code >= 400:
-                    # Client-Fehler: Wahrscheinlich kein Retry nötig
-                    error_msg = resp.text[:200] if resp.text else "Unknown error"
-                    self._log(f"Client error {resp.status_code}: {error_msg}", "ERROR")
-                    raise Exception(f"Client error {resp.status_code}: {error_msg}")
+
+                # Übrige Client-/Server-Fehler: ein Retry würde dasselbe Ergebnis liefern
+                error_msg = resp.text[:200] if resp.text else "Unknown error"
+                self._log(f"HTTP error {resp.status_code} is not recoverable, not retrying: {error_msg}", "ERROR")
+                raise Exception(f"Client error {resp.status_code}: {error_msg}")
+
+            except requests.exceptions.SSLError as e:
+                # Zertifikats-/TLS-Fehler behebt ein erneuter Versuch nicht
+                self._log(f"SSL error is not recoverable, not retrying: {e}", "ERROR")
+                raise Exception(f"SSL error: {e}")
 
             except requests.exceptions.ConnectionError as e:
+                self._invalidate_health()
+                if _is_name_resolution_error(e):
+                    self._log(f"Server name cannot be resolved, not retrying: {e}", "ERROR")
+                    raise Exception(f"Name resolution failed: {e}")
+
                 error_str = str(e)
                 if "Connection aborted" in error_str or "Connection reset" in error_str:
                     self._log(f"Connection reset on attempt {attempt + 1} (server may have restarted)", "WARNING")
-                    # Bei Connection Reset besonders lange warten
-                    if attempt < max_retries - 1:
-                        extra_delay = 15  # Extra 15 Sekunden bei Connection Reset
-                        self._log(f"Server may be restarting, waiting extra {extra_delay}s...", "INFO")
-                        time.sleep(extra_delay)
                     continue
                 else:
                     self._log(f"Connection error: {error_str}", "ERROR")
@@ -306,13 +591,16 @@ class WhisperXProcessor:
                     continue
 
             except requests.exceptions.Timeout as e:
+                self._invalidate_health()
                 self._log(f"Timeout after {current_timeout}s on attempt {attempt + 1}", "WARNING")
                 if attempt == max_retries - 1:
                     raise Exception(f"Timeout after {max_retries} attempts (last timeout: {current_timeout}s)")
                 continue
 
-            except Exception as e:
-                self._log(f"Unexpected error on attempt {attempt + 1}: {str(e)}", "WARNING")
+            except requests.exceptions.ChunkedEncodingError as e:
+                # Verbindung während der Antwort abgebrochen
+                self._invalidate_health()
+                self._log(f"Incomplete response on attempt {attempt + 1}: {e}", "WARNING")
                 if attempt == max_retries - 1:
                     raise Exception(f"Failed after {max_retries} attempts: {str(e)}")
                 continue
@@ -320,34 +608,60 @@ class WhisperXProcessor:
         # Sollte nicht erreicht werden
         raise Exception(f"Failed to process file after {max_retries} attempts")
 
-    def _process_large_file(self, audio_file_path):
+    def _upload_progress_callback(self, file_name):
+        """Erzeugt einen Callback, der den Upload-Fortschritt in 25%-Schritten loggt"""
+        next_step = [25]
+
+        def callback(monitor):
+            percent = monitor.bytes_read * 100 // max(monitor.len, 1)
+            if percent >= next_step[0]:
+                self._log(f"Upload {file_name}: {percent}%", "INFO")
+                next_step[0] = (percent // 25 + 1) * 25
+
+        return callback
+
+    def _process_large_file(self, audio_file_path, timeout_hint=None, verbose=True):
         """Verarbeitet große Dateien mit Chunking"""
         self._log("Verarbeite große Datei mit Chunking...", "INFO")
 
-        # Teile Datei in kleinere Segmente
-        chunks = self._split_audio_file(audio_file_path)
         all_segments = []
+        chunk_prefix = os.path.splitext(os.path.basename(audio_file_path))[0]
+        max_workers = max(1, settings.WHISPERX_PARALLEL_CHUNKS)
 
-        for i, chunk_path in enumerate(chunks):
-            self._log(f"Verarbeite Chunk {i + 1}/{len(chunks)}...", "INFO")
+        # Höchstens so viele Chunks gleichzeitig im Speicher: laufende Uploads plus kleiner Vorlauf
+        chunk_slots = threading.BoundedSemaphore(max_workers + 2)
+
+        # Chunks sind unabhängig voneinander: parallel hochladen, Ergebnisse in Reihenfolge einsammeln.
+        # Dieser Thread bereitet den nächsten Chunk vor, während die Worker die vorherigen senden.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
             try:
-                result = self._process_standard_file(chunk_path)
-                if result and 'segments' in result:
-                    # Verschiebe Timestamps entsprechend dem Chunk-Offset
-                    chunk_offset = i * 30  # 30 Sekunden pro Chunk
-                    for segment in result['segments']:
-                        segment['start'] += chunk_offset
-                        segment['end'] += chunk_offset
-                    all_segments.extend(result['segments'])
+                # Teile Datei in kleinere Segmente (im Speicher, ohne temporäre Dateien)
+                for i, chunk_buffer in self._split_audio_file(audio_file_path):
+                    chunk_slots.acquire()
+                    # Zeitstempel werden schon beim Parsen um den Chunk-Offset (30 s pro Chunk) verschoben
+                    future = executor.submit(self._process_standard_buffer, chunk_buffer,
+                                             f"{chunk_prefix}_chunk_{i}.wav", timeout_hint,
+                                             time_offset=i * 30, verbose=verbose)
+                    future.add_done_callback(lambda _: chunk_slots.release())
+                    futures.append(future)
             except Exception as e:
-                self._log(f"Fehler bei Chunk {i + 1}: {e}", "WARNING")
-            finally:
-                # Lösche temporäre Chunk-Datei
-                if os.path.exists(chunk_path):
-                    os.remove(chunk_path)
+                self._log(f"Fehler beim Aufteilen der Audio-Datei: {e}", "ERROR")
+                # Fallback: gesamte Datei in einem Request
+                futures = [executor.submit(self._process_standard_file, audio_file_path, timeout_hint, verbose)]
+
+            self._log(f"Verarbeite {len(futures)} Chunks ({max_workers} parallel)...", "INFO")
+
+            for i, future in enumerate(futures):
+                try:
+                    result = future.result()
+                    if result and 'segments' in result:
+                        all_segments.extend(result['segments'])
+                except Exception as e:
+                    self._log(f"Fehler bei Chunk {i + 1}: {e}", "WARNING")
 
         # Kombiniere Ergebnisse
-        full_transcription = " ".join([seg['text'] for seg in all_segments])
+        full_transcription = " ".join(seg['text'] for seg in all_segments)
         labeled_transcription = self._create_labeled_transcription(all_segments)
 
         return {
@@ -358,65 +672,91 @@ class WhisperXProcessor:
         }
 
     def _split_audio_file(self, audio_file_path, chunk_duration=30):
-        """Teilt Audio-Datei in Chunks auf"""
-        chunks = []
-        try:
-            audio, sr = sf.read(audio_file_path)
+        """
+        Teilt Audio-Datei in Chunks auf
+
+        Liest blockweise, ohne die ganze Datei zu laden, und liefert jeden Chunk
+        als WAV im Speicher.
+
+        Yields:
+            Tuple aus Chunk-Index und BytesIO mit WAV-Daten
+        """
+        if os.path.getsize(audio_file_path) > 0:
+            with open(audio_file_path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                layout = _pcm16_wav_layout(mm)
+                if layout is not None:
+                    # 16-bit-PCM: Rohdaten direkt ausschneiden, kein Decodieren/Encodieren
+                    yield from self._split_pcm16_wav(mm, layout, chunk_duration)
+                    return
+
+        with sf.SoundFile(audio_file_path) as f:
+            sr = f.samplerate
             chunk_samples = int(chunk_duration * sr)
-
-            for i in range(0, len(audio), chunk_samples):
-                chunk = audio[i:i + chunk_samples]
-                chunk_path = audio_file_path.replace('.wav', f'_chunk_{i // chunk_samples}.wav')
-                sf.write(chunk_path, chunk, sr)
-                chunks.append(chunk_path)
-
-            self._log(f"Audio in {len(chunks)} Chunks aufgeteilt", "INFO")
-            return chunks
-
-        except Exception as e:
-            self._log(f"Fehler beim Aufteilen der Audio-Datei: {e}", "ERROR")
-            return [audio_file_path]
-
-    def _parse_response(self, resp):
-        """Parst die Antwort von WhisperX"""
+            self._log(f"Audio in {-(-f.frames // chunk_samples)} Chunks aufgeteilt", "INFO")
+
+            # Ein Lesepuffer für alle Chunks (float32 reicht für bis zu 24 Bit),
+            # jeder Chunk wird sofort als WAV geschrieben, bevor der nächste gelesen wird
+            block_buffer = np.empty((min(chunk_samples, f.frames), f.channels), dtype=np.float32)
+
+            for i, chunk in enumerate(f.blocks(out=block_buffer)):
+                chunk_buffer = io.BytesIO()
+                sf.write(chunk_buffer, chunk, sr, format='WAV', subtype='PCM_16')
+                chunk_buffer.seek(0)
+                yield i, chunk_buffer
+
+    def _split_pcm16_wav(self, data, layout, chunk_duration):
+        """Schneidet 16-bit-PCM-Daten in Chunks und stellt jedem einen neuen WAV-Header voran"""
+        channels, sr, data_offset, data_size = layout
+        chunk_bytes = int(chunk_duration * sr) * channels * 2
+        data_end = data_offset + data_size - data_size % (channels * 2)  # Nur vollständige Frames
+        self._log(f"Audio in {-(-(data_end - data_offset) // chunk_bytes)} Chunks aufgeteilt", "INFO")
+
+        for i, start in enumerate(range(data_offset, data_end, chunk_bytes)):
+            raw = data[start:min(start + chunk_bytes, data_end)]
+            chunk_buffer = io.BytesIO()
+            chunk_buffer.write(_pcm16_wav_header(channels, sr, len(raw)))
+            chunk_buffer.write(raw)
+            chunk_buffer.seek(0)
+            yield i, chunk_buffer
+
+    def _parse_response(self, resp, time_offset=0, verbose=True):
+        """
+        Parst die Antwort von WhisperX
+
+        time_offset verschiebt alle Segment-Zeitstempel, verbose=False unterdrückt die Diagnose-Ausgaben.
+        """
         try:
-            response_data = resp.json()
+            response_data = _json_loads(resp.content)
             self._log("Server-Antwort erhalten", "SUCCESS")
 
             # Debugging: Prüfen, welche Felder in der Antwort enthalten sind
-            self._log(f"Antwort-Felder: {', '.join(response_data.keys())}", "INFO")
+            if verbose:
+                self._log(f"Antwort-Felder: {', '.join(response_data.keys())}", "INFO")
 
             # Flexible Extraktion der Daten
             full_transcription = response_data.get("transcription", response_data.get("text", ""))
             segments = response_data.get("segments", [])
 
-            # Verarbeite Segmente
-            processed_segments = []
-            if segments:
+            # Verarbeite Segmente: eine Schleife ohne Verzweigungen, Namen lokal gebunden
+            if segments and verbose:
                 self._log(f"Verarbeite {len(segments)} Segmente...", "INFO")
 
-                for segment in segments:
+            get = dict.get
+            processed_segments = [
+                {
+                    'start': (start := get(segment, 'start', 0)) + time_offset,
+                    'end': (end := get(segment, 'end', 0)) + time_offset,
                     # Extrahiere Sprecher-Info falls vorhanden
-                    speaker = segment.get("speaker", "SPEAKER_0")
-
-                    # Wenn WhisperX keine Sprecher zurückgibt, alterniere zwischen SPEAKER_0 und SPEAKER_1
-                    if speaker == "SPEAKER_0" and settings.WHISPERX_ENABLE_DIARIZATION:
-                        # Einfache Heuristik: wechsle Sprecher bei größeren Pausen
-                        if processed_segments:
-                            last_end = processed_segments[-1]['end']
-                            current_start = segment.get('start', 0)
-                            if current_start - last_end > 2.0:  # Pause > 2 Sekunden
-                                speaker = "SPEAKER_1" if processed_segments[-1][
-                                                             'speaker'] == "SPEAKER_0" else "SPEAKER_0"
-
-                    processed_segment = {
-                        'start': segment.get('start', 0),
-                        'end': segment.get('end', 0),
-                        'speaker': speaker,
-                        'text': segment.get('text', ''),
-                        'duration': segment.get('end', 0) - segment.get('start', 0)
-                    }
-                    processed_segments.append(processed_segment)
+                    'speaker': get(segment, 'speaker', "SPEAKER_0"),
+                    'text': get(segment, 'text', ''),
+                    'duration': end - start
+                }
+                for segment in segments
+            ]
+
+            # Wenn WhisperX keine Sprecher zurückgibt, alterniere zwischen SPEAKER_0 und SPEAKER_1
+            if processed_segments and settings.WHISPERX_ENABLE_DIARIZATION:
+                self._alternate_default_speakers(processed_segments)
 
             # Erstelle Transkription mit Sprecher-Labels
             labeled_transcription = self._create_labeled_transcription(processed_segments)
@@ -434,38 +774,61 @@ class WhisperXProcessor:
 
         except json.JSONDecodeError as e:
             self._log(f"Ungültige JSON-Antwort vom Server: {e}", "ERROR")
-            self._log(f"Server-Antwort (erste 500 Zeichen): {resp.text[:500]}", "ERROR")
+            self._log(f"Server-Antwort (erste 500 Zeichen): {resp.content[:500].decode('utf-8', 'replace')}", "ERROR")
             raise Exception(f"Ungültige JSON-Antwort: {e}")
 
+    def _alternate_default_speakers(self, segments):
+        """Einfache Heuristik: wechsle Sprecher bei größeren Pausen (> 2 Sekunden)"""
+        last_end = 0
+        last_bit = None  # 0 = letzter Sprecher war SPEAKER_0, 1 = ein anderer
+
+        for segment in segments:
+            is_default = segment['speaker'] == "SPEAKER_0"
+            if is_default and last_bit is not None and segment['start'] - last_end > 2.0:
+                last_bit ^= 1
+                segment['speaker'] = _ALTERNATING_SPEAKERS[last_bit]
+            else:
+                last_bit = 0 if is_default else 1
+            last_end = segment['end']
+
     def _create_labeled_transcription(self, segments):
         """Erstellt eine formatierte Transkription mit Sprecher-Labels"""
         if not segments:
             return "Keine Segmente verfügbar."
 
         try:
-            labeled_text = []
-            current_speaker = None
-
-            # Gruppiere nach Sprechern in chronologischer Reihenfolge
-            for segment in segments:
-                speaker = segment['speaker']
-                text = segment.get('text', '')
-
-                # Skip leere Segmente
-                if not text.strip():
-                    continue
-
-                # Neuen Sprecher mit eigenem Label beginnen
-                if speaker != current_speaker:
-                    current_speaker = speaker
-                    labeled_text.append(f"\n[{speaker}]: ")
-
-                # Text hinzufügen
-                labeled_text.append(text + " ")
-
-            return "".join(labeled_text).strip()
+            return "".join(self._iter_labeled_transcription(segments)).strip()
 
         except Exception as e:
             self._log(f"Fehler in _create_labeled_transcription: {str(e)}", "ERROR")
             traceback.print_exc()
-            return "Fehler bei der Erstellung der Transkription."
\ No newline at end of file
+            return "Fehler bei der Erstellung der Transkription."
+
+    def _iter_labeled_transcription(self, segments):
+        """
+        Liefert die Sprecher-Transkription als Folge von Textfragmenten
+
+        Zum direkten Schreiben in eine Datei, ohne den ganzen Text im Speicher
+        aufzubauen. Das erste Fragment beginnt mit einem Zeilenumbruch, das letzte
+        endet mit einem Leerzeichen (_create_labeled_transcription entfernt beides).
+        """
+        # Ein Durchlauf: ein Label pro Sprecherwechsel, jedes Label wird nur einmal formatiert
+        prefixes = {}
+        current_speaker = _NO_SPEAKER
+
+        for segment in segments:
+            text = segment.get('text', '')
+            # Skip leere Segmente
+            if not text.strip():
+                continue
+
+            speaker = segment['speaker']
+            if speaker != current_speaker:
+                prefix = prefixes.get(speaker)
+                if prefix is None:
+                    prefix = prefixes[speaker] = f"\n[{speaker}]: "
+                yield prefix
+                current_speaker = speaker
+
+            yield text
+            yield ' '
@@ -15,18 +15,37 @@ class Environment(Enum):
 
 CURRENT_ENV = Environment(os.getenv('ATA_ENV', 'prod'))
 
+# Bereits gelesene und konvertierte Environment Variables (ändern sich nach dem Start nicht)
+_env_cache = {}
+
 # Helper Function for Environment Variables
 def get_env_setting(key: str, default, cast_type: type = str):
-    """Lädt Einstellung aus Environment Variables mit Fallback"""
-    value = os.getenv(f"ATA_{key}", default)
-    if cast_type != str and value != default:
-        try:
-            if cast_type == bool:
-                return value.lower() in ('true', '1', 'yes', 'on')
-            return cast_type(value)
-        except (ValueError, TypeError):
-            return default
-    return value
+    """Lädt Einstellung aus Environment Variables mit Fallback (jede Kombination nur einmal)"""
+    # Listen-Defaults sind nicht hashbar, im Cache-Schlüssel als Tuple
+    cache_key = (key, tuple(default) if isinstance(default, list) else default, cast_type)
+    try:
+        value = _env_cache[cache_key]
+    except KeyError:
+        value = _env_cache[cache_key] = _read_env_setting(key, default, cast_type)
+    # Listen als Kopie zurückgeben, damit Aufrufer den Cache nicht verändern
+    return list(value) if cast_type == list else value
+
+def _read_env_setting(key: str, default, cast_type: type):
+    """Liest und konvertiert eine einzelne Environment Variable"""
+    value = os.getenv(f"ATA_{key}")
+    if value is None:
+        return default
+    if cast_type == str:
+        return value
+    try:
+        if cast_type == bool:
+            return value.lower() in ('true', '1', 'yes', 'on')
+        if cast_type == list:
+            # Kommagetrennte Liste, z.B. ATA_CRITICAL_SERVICES="whisperx,summarization"
+            return [item.strip() for item in value.split(',') if item.strip()]
+        return cast_type(value)
+    except (ValueError, TypeError):
+        return default
 
 # =============================================================================
 # APPLICATION METADATA
@@ -48,6 +67,7 @@ CHANNELS = get_env_setting("CHANNELS", 2, int)            # Stereo
 BUFFER_SIZE = get_env_setting("BUFFER_SIZE", 4096, int)   # Audio-Puffergröße (Samples)
 LATENCY = get_env_setting("LATENCY", "high")              # "low", "high" - Latenz vs. Stabilität
 QUEUE_SIZE = get_env_setting("QUEUE_SIZE", 100, int)      # Interne Queue-Größe
+MAX_OUTPUT_BUFFER_CHUNKS = get_env_setting("MAX_OUTPUT_BUFFER_CHUNKS", 500, int)  # Max. gepufferte Chunks vor Verwerfen
 DEVICE_TIMEOUT = get_env_setting("DEVICE_TIMEOUT", 0.2, float)  # Geräte-Timeout in Sekunden
 
 # Standard-Kanalanzahl (Fallback)
@@ -71,6 +91,15 @@ MAX_GROUP_DURATION = get_env_setting("MAX_GROUP_DURATION", 30.0, float)       #
 MAX_SPEAKERS = get_env_setting("MAX_SPEAKERS", 3, int)                        # Max. erwartete Sprecher
 VAD_AGGRESSIVENESS = get_env_setting("VAD_AGGRESSIVENESS", 2, int)            # Voice Activity Detection (0-3)
 
+# VAD-Backend: "webrtc" (Standard) oder "silero" (benötigt onnxruntime und das Silero-ONNX-Modell)
+VAD_BACKEND = get_env_setting("VAD_BACKEND", "webrtc")
+SILERO_VAD_MODEL_PATH = get_env_setting("SILERO_VAD_MODEL_PATH", "")          # Pfad zu silero_vad.onnx
+SILERO_VAD_THRESHOLD = get_env_setting("SILERO_VAD_THRESHOLD", 0.5, float)    # Sprachwahrscheinlichkeit (0-1)
+SILERO_VAD_BATCH_SIZE = get_env_setting("SILERO_VAD_BATCH_SIZE", 16, int)     # Parallele Teilströme pro Inferenz
+
+# Rechengerät für das Spektrogramm der Diarization: "cpu" oder "cuda" (benötigt torch mit CUDA)
+DIARIZER_DEVICE = get_env_setting("DIARIZER_DEVICE", "cpu")
+
 # =============================================================================
 # SERVER CONFIGURATION (zentrale IP-Definition)
 # =============================================================================
@@ -92,6 +121,10 @@ WHISPERX_TIMEOUT = get_env_setting("WHISPERX_TIMEOUT", 120, int)               #
 WHISPERX_LANGUAGE = get_env_setting("WHISPERX_LANGUAGE", "de")                 # Sprache für Transkription
 WHISPERX_COMPUTE_TYPE = get_env_setting("WHISPERX_COMPUTE_TYPE", "float16")    # GPU-Compute-Type
 WHISPERX_ENABLE_DIARIZATION = get_env_setting("WHISPERX_ENABLE_DIARIZATION", True, bool)  # API-Diarization
+WHISPERX_PARALLEL_CHUNKS = get_env_setting("WHISPERX_PARALLEL_CHUNKS", 4, int)  # Gleichzeitige Chunk-Uploads
+WHISPERX_SKIP_HEALTHCHECK_LOCAL = get_env_setting("WHISPERX_SKIP_HEALTHCHECK_LOCAL", False, bool)  # Kein Health Check bei localhost
+WHISPERX_CHUNKING_MIN_MB = get_env_setting("WHISPERX_CHUNKING_MIN_MB", 0, int)  # Ab dieser Größe in 30s-Chunks senden (0 = aus)
+WHISPERX_UPLOAD_PROGRESS = get_env_setting("WHISPERX_UPLOAD_PROGRESS", False, bool)  # Upload-Fortschritt loggen (requests-toolbelt)
 
 # =============================================================================
 # SYSTEM REQUIREMENTS (nur Python-Version)
@@ -164,6 +197,9 @@ OLLAMA_GENERATE_TIMEOUT = get_env_setting("OLLAMA_GENERATE_TIMEOUT", 30, int)
 # Summarization Specific
 SUMMARIZATION_TIMEOUT = get_env_setting("SUMMARIZATION_TIMEOUT", 60, int)
 SUMMARIZATION_DETAILED_ANALYSIS = get_env_setting("SUMMARIZATION_DETAILED_ANALYSIS", True, bool)
+SUMMARY_CACHE_TTL = get_env_setting("SUMMARY_CACHE_TTL", 3600, int)      # Gültigkeit gecachter Zusammenfassungen (s)
+SUMMARY_CACHE_SIZE = get_env_setting("SUMMARY_CACHE_SIZE", 256, int)     # Max. Anzahl gecachter Zusammenfassungen
+SUMMARIZATION_HTTP2 = get_env_setting("SUMMARIZATION_HTTP2", False, bool)  # HTTP/2 über httpx (optional)
 
 # Service Health Check Retry Settings
 HEALTH_CHECK_RETRIES = get_env_setting("HEALTH_CHECK_RETRIES", 3, int)
@@ -182,4 +218,4 @@ OPTIONAL_SERVICES = get_env_setting("OPTIONAL_SERVICES", ["summarization", "olla
 # Service-spezifische Feature Flags
 ENABLE_WHISPERX_HEALTH_CHECK = get_env_setting("ENABLE_WHISPERX_HEALTH_CHECK", True, bool)
 ENABLE_SUMMARIZATION_HEALTH_CHECK = get_env_setting("ENABLE_SUMMARIZATION_HEALTH_CHECK", True, bool)
-ENABLE_OLLAMA_HEALTH_CHECK = get_env_setting("ENABLE_OLLAMA_HEALTH_CHECK", True, bool)
\ No newline at end of file
+ENABLE_OLLAMA_HEALTH_CHECK = get_env_setting("ENABLE_OLLAMA_HEALTH_CHECK", True, bool)
@@ -17,49 +17,89 @@ class SpeakerTimelineWidget(tk.Frame):
         self.speaker_colors = {}
         self.color_palette = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8', '#F7DC6F', '#BB8FCE']
 
+        # Wiederverwendbare Canvas-Items: beim Neuzeichnen nur verschieben/umfärben statt neu anlegen
+        self._rect_pool = []
+        self._text_pool = []
+
+    def clear(self):
+        """Entfernt alle Segmente von der Timeline"""
+        self.canvas.delete("all")
+        self._rect_pool.clear()
+        self._text_pool.clear()
+
     def display_segments(self, segments, total_duration):
         """Zeigt die Sprecher-Segmente auf der Timeline an mit verbessertem Design"""
-        self.canvas.delete("all")
+        self.canvas.delete("marker")
 
         if not segments:
+            self._hide_unused(self._rect_pool, 0)
+            self._hide_unused(self._text_pool, 0)
             return
 
-        # Farben für Sprecher zuweisen
-        speakers = list(set(seg['speaker'] for seg in segments))
-        for i, speaker in enumerate(speakers):
-            self.speaker_colors[speaker] = self.color_palette[i % len(self.color_palette)]
-
         # Verbesserte Timeline mit weniger Rand
         timeline_top = 12  # Reduziert von 20
         timeline_bottom = self.height - 20  # Mehr Platz für Zeitmarkierungen
         timeline_height = timeline_bottom - timeline_top
 
+        rect_pool = self._rect_pool
+        text_pool = self._text_pool
+        speaker_colors = self.speaker_colors
+        label_count = 0
+
         # Timeline zeichnen
-        for segment in segments:
+        for i, segment in enumerate(segments):
             start_x = (segment['start'] / total_duration) * (self.width - 20) + 10  # 10px Rand links/rechts
             end_x = (segment['end'] / total_duration) * (self.width - 20) + 10
-            color = self.speaker_colors[segment['speaker']]
+
+            # Farben für Sprecher in der Reihenfolge ihres ersten Auftretens zuweisen (stabil über Neuzeichnen)
+            color = speaker_colors.get(segment['speaker'])
+            if color is None:
+                color = self.color_palette[len(speaker_colors) % len(self.color_palette)]
+                speaker_colors[segment['speaker']] = color
 
             # Segment zeichnen
             segment_width = max(end_x - start_x, 2)  # Mindestens 2 Pixel breit
 
-            self.canvas.create_rectangle(
-                start_x, timeline_top, end_x, timeline_bottom,
-                fill=color, outline=color, width=0  # Keine Umrandung
-            )
+            if i < len(rect_pool):
+                self.canvas.coords(rect_pool[i], start_x, timeline_top, end_x, timeline_bottom)
+                self.canvas.itemconfig(rect_pool[i], fill=color, outline=color, state='normal')
+            else:
+                rect_pool.append(self.canvas.create_rectangle(
+                    start_x, timeline_top, end_x, timeline_bottom,
+                    fill=color, outline=color, width=0, tags="segment"  # Keine Umrandung
+                ))
 
             # Sprecher-Label nur bei größeren Segmenten
             if segment_width > 30:  # Nur wenn mindestens 30 Pixel breit
                 # Kompakte Label
                 label_text = segment['speaker'].replace('SPEAKER_', 'S')
-                self.canvas.create_text(
-                    (start_x + end_x) / 2, (timeline_top + timeline_bottom) / 2,
-                    text=label_text, fill='white', font=('Arial', 8, 'bold')
-                )
+                label_x = (start_x + end_x) / 2
+                label_y = (timeline_top + timeline_bottom) / 2
+                if label_count < len(text_pool):
+                    self.canvas.coords(text_pool[label_count], label_x, label_y)
+                    self.canvas.itemconfig(text_pool[label_count], text=label_text, state='normal')
+                else:
+                    text_pool.append(self.canvas.create_text(
+                        label_x, label_y,
+                        text=label_text, fill='white', font=('Arial', 8, 'bold'), tags="label"
+                    ))
+                label_count += 1
+
+        # Überzählige Items aus früheren Durchläufen ausblenden statt löschen
+        self._hide_unused(rect_pool, len(segments))
+        self._hide_unused(text_pool, label_count)
+
+        # Neu angelegte Segmente dürfen wiederverwendete Labels nicht verdecken
+        self.canvas.tag_raise("label")
 
         # Verbesserte Zeitmarkierungen
         self._draw_time_markers(total_duration, timeline_bottom)
 
+    def _hide_unused(self, pool, used):
+        """Blendet die Pool-Items ab Index used aus"""
+        for item in pool[used:]:
+            self.canvas.itemconfig(item, state='hidden')
+
     def _draw_time_markers(self, total_duration, y_pos):
         """Zeichnet verbesserte Zeitmarkierungen"""
         # Intelligente Intervalle basierend auf Gesamtdauer
@@ -74,7 +114,7 @@ class SpeakerTimelineWidget(tk.Frame):
             x = (i / total_duration) * (self.width - 20) + 10
 
             # Dezentere Markierungen
-            self.canvas.create_line(x, y_pos, x, y_pos + 5, fill='#CCCCCC', width=1)
+            self.canvas.create_line(x, y_pos, x, y_pos + 5, fill='#CCCCCC', width=1, tags="marker")
 
             # Zeitlabels formatieren
             if i >= 60:
@@ -86,10 +126,13 @@ class SpeakerTimelineWidget(tk.Frame):
 
             # Kleinere Schrift für Zeitlabels
             self.canvas.create_text(x, y_pos + 8, text=time_text,
-                                    anchor='n', fill='#666666', font=('Arial', 7))
+                                    anchor='n', fill='#666666', font=('Arial', 7), tags="marker")
 
 
 class TranscriptionWidget(tk.Frame):
+    # Trennlinie zwischen vollständiger und sprecherweiser Transkription
+    _SEPARATOR = "-" * 40 + "\n\n"
+
     def __init__(self, parent):
         super().__init__(parent)
 
@@ -103,6 +146,9 @@ class TranscriptionWidget(tk.Frame):
         self.text.config(yscrollcommand=scrollbar.set)
         scrollbar.config(command=self.text.yview)
 
+        # Tag für Überschriften konfigurieren (einmalig)
+        self.text.tag_configure("heading", font=('Arial', 10, 'bold'), spacing1=5, spacing3=5)
+
         # Tags für Sprecher-Farben definieren
         self.speaker_tags = {}
         self.color_palette = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
@@ -116,39 +162,44 @@ class TranscriptionWidget(tk.Frame):
             full_text = result.get('transcription', result.get('full_text', ''))
             self.text.insert(tk.END, "Vollständige Transkription:\n", "heading")
             self.text.insert(tk.END, full_text + "\n\n")
-            self.text.insert(tk.END, "-" * 40 + "\n\n")
+            self.text.insert(tk.END, self._SEPARATOR)
 
         # Dann die nach Sprechern geordnete Transkription
         self.text.insert(tk.END, "Transkription nach Sprechern:\n\n", "heading")
 
-        # Tag für Überschriften konfigurieren
-        self.text.tag_configure("heading", font=('Arial', 10, 'bold'), spacing1=5, spacing3=5)
-
         if 'segments' in result and result['segments']:
-            current_speaker = None
-
-            for segment in result['segments']:
-                speaker = segment['speaker']
-                text = segment.get('text', '')
+            # Leere Segmente überspringen
+            entries = [(segment['speaker'], text) for segment in result['segments']
+                       if (text := segment.get('text', '')).strip()]
 
-                # Leere Segmente überspringen
-                if not text.strip():
-                    continue
+            # Tags für neue Sprecher vorab erstellen, die Schleife liest sie dann nur noch
+            self._configure_speaker_tags(dict.fromkeys(speaker for speaker, _ in entries))
+            speaker_tags = self.speaker_tags
 
-                # Tag für Sprecher erstellen, falls noch nicht vorhanden
-                if speaker not in self.speaker_tags:
-                    color = self.color_palette[len(self.speaker_tags) % len(self.color_palette)]
-                    tag_name = f"speaker_{speaker}"
-                    self.text.tag_configure(tag_name, foreground=color, font=('Arial', 10, 'bold'))
-                    self.speaker_tags[speaker] = tag_name
+            current_speaker = None
+            # Abwechselnd Text und Tags, alles wird mit einem einzigen insert-Aufruf eingefügt
+            chunks = []
 
+            for speaker, text in entries:
                 # Sprecherwechsel anzeigen
                 if speaker != current_speaker:
                     current_speaker = speaker
-                    self.text.insert(tk.END, f"\n{speaker}: ", self.speaker_tags[speaker])
+                    chunks.extend((f"\n{speaker}: ", speaker_tags[speaker]))
 
                 # Text einfügen
-                self.text.insert(tk.END, text + " ")
+                chunks.extend((text + " ", ()))
+
+            if chunks:
+                self.text.insert(tk.END, *chunks)
 
             # Zur Anfang scrollen
-            self.text.see("1.0")
\ No newline at end of file
+            self.text.see("1.0")
+
+    def _configure_speaker_tags(self, speakers):
+        """Erstellt die Farb-Tags für noch unbekannte Sprecher (in Reihenfolge des Auftretens)"""
+        for speaker in speakers:
+            if speaker not in self.speaker_tags:
+                color = self.color_palette[len(self.speaker_tags) % len(self.color_palette)]
+                tag_name = f"speaker_{speaker}"
+                self.text.tag_configure(tag_name, foreground=color, font=('Arial', 10, 'bold'))
+                self.speaker_tags[speaker] = tag_name
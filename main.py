@@ -490,7 +490,7 @@ class ATAAudioApplication:
             self.status_label.config(text=f"Status: Aufnahme läuft{api_info}")
 
             # Timeline und Transkription leeren
-            self.speaker_timeline.canvas.delete("all")
+            self.speaker_timeline.clear()
             self.transcription_widget.text.delete(1.0, tk.END)
             self.summary_widget.clear()
 
@@ -678,8 +678,10 @@ class ATAAudioApplication:
         if self.recording:
             if messagebox.askyesno("Beenden", "Die Aufnahme läuft noch. Wirklich beenden?"):
                 self.stop_recording()
+                self.summarization_client.close()
                 self.root.destroy()
         else:
+            self.summarization_client.close()
             self.root.destroy()
 
 
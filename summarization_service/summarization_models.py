@@ -7,7 +7,7 @@ import json
 import asyncio
 import aiohttp
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from prompts import SYSTEM_PROMPT, CONVERSATION_SUMMARY_PROMPT, MEETING_ANALYSIS_PROMPT
 
 logger = logging.getLogger(__name__)
@@ -303,6 +303,28 @@ class SummarizationService:
         else:
             raise Exception("Failed to generate summary")
 
+    async def summarize_conversations(self, items: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Erstellt Zusammenfassungen für mehrere Transkripte in einem Aufruf (für /summarize/batch)
+
+        Returns:
+            Liste der Zusammenfassungen in Eingabe-Reihenfolge, None für fehlgeschlagene Einträge
+        """
+        if not self.initialized:
+            await self.initialize()
+
+        results = await asyncio.gather(
+            *(self.summarize_conversation(item) for item in items), return_exceptions=True)
+
+        summaries = []
+        for idx, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Batch item {idx} failed: {result}")
+                summaries.append(None)
+            else:
+                summaries.append(result)
+        return summaries
+
     def _prepare_text_for_summarization(self, transcript_data: Dict) -> str:
         """Bereitet den Text optimal für die Zusammenfassung vor"""
         # Priorisiere labeled_text für bessere Speaker-Erkennung